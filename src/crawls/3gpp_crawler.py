@@ -1,19 +1,32 @@
-from scrapy import Spider, Request
-from scrapy.pipelines.files import FilesPipeline
+from scrapy import Request
 from urllib.parse import urljoin
+from twisted.internet.defer import DeferredList
 from typing import override
 import os
 import sys
-import shutil
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
 
-from utils.file_helpers import extract_nested_zip, convert_doc_to_pdf
+from utils.file_helpers import extract_nested_zip
+from utils.doc_converter import DocConverterPool
 from utils.logger import *
-from config import RAW_DATA_PATH
+from config import RAW_DATA_PATH, CRAWL_JOBS_DIR
+from manifest import ManifestFilesPipeline
+from job_state import ResumableSpider
+from post_download import PostDownloadStage
+from spec_catalog import SpecCatalog, version_label
 
 OUTPUT_DIR = os.path.join(RAW_DATA_PATH, "3gpp_spec")
 
+CONVERT_WORKERS = 4
+
+# With CONVERT_TO_PDF off, .docx files are kept for the native DOCX parser and only
+# legacy .doc files go through LibreOffice (to .docx).
+CONVERT_TO_PDF = True
+CONVERT_FORMAT = "pdf" if CONVERT_TO_PDF else "docx"
+CONVERT_EXTENSIONS = (".doc", ".docx") if CONVERT_TO_PDF else (".doc",)
+EXTRACT_WORKERS = None  # defaults to os.cpu_count()
+
 RELEASES = [f"Rel-{i}" for i in [15, 16, 17, 18]]
 
 SERIES_LIST = [
@@ -76,64 +89,141 @@ IMPORTANT_TS = [
     "39.900", "39.910", "39.912"
 ]
 
-class ThreeGPPFilesPipeline(FilesPipeline):
+CATALOG = SpecCatalog(IMPORTANT_TS)
+
+# Keep only the newest version of each spec across RELEASES instead of one per release.
+NEWEST_ONLY = True
+
+class ThreeGPPFilesPipeline(ManifestFilesPipeline):
+    @override
+    def open_spider(self, spider):
+        super().open_spider(spider)
+        self.converter = DocConverterPool(workers=CONVERT_WORKERS, target_format=CONVERT_FORMAT)
+        self.stage = PostDownloadStage(spider.crawler.stats, workers=EXTRACT_WORKERS)
+        self.extracting = set()
+        self.resumed = self._resume_tasks()
+
     def file_path(self, request, response=None, info=None, *, item=None):
         file_name = os.path.basename(request.url)
         release = item.get("release")
         series = item.get("series")
         return os.path.join(release, series, file_name)
 
+    @override
+    def has_outputs(self, request, item):
+        extract_path = item.get("extract_path")
+        return any(files for _, _, files in os.walk(extract_path))
+
     @override
     def item_completed(self, results, item, info):
+        # Extraction runs in a process pool and conversion in the LibreOffice pool; the
+        # returned Deferred keeps the reactor free to download while they work.
+        jobs = []
         for success, file_info in results:
-            if success:
-                file_path = file_info['path']
-                full_path = os.path.join(info.spider.settings.get('FILES_STORE'), file_path)
-                extract_path = item.get("extract_path")
-                os.makedirs(extract_path, exist_ok=True)
-
-                extract_nested_zip(full_path, extract_path)
-
-                for root, dirs, files in os.walk(extract_path):
-                    for file in files:
-                        if not file.endswith((".doc", ".docx")):
-                            os.remove(os.path.join(root, file))
-
-                    for dir_name in dirs:
-                        dir_path = os.path.join(root, dir_name)
-                        if not os.listdir(dir_path):
-                            shutil.rmtree(dir_path)
-
-                for root, _, files in os.walk(extract_path):
-                    for file in files:
-                        if file.endswith((".doc", ".docx")):
-                            doc_path = os.path.join(root, file)
-                            pdf_path = os.path.splitext(doc_path)[0] + ".pdf"
-                            try:
-                                convert_doc_to_pdf(doc_path, pdf_path)
-                                os.remove(doc_path)
-                            except Exception as e:
-                                log_error(f"Failed to convert {doc_path} to PDF: {e}")
-
-        return item
-    
-    @override
-    def close_spider(self, spider):
-        zip_folder = spider.settings.get('FILES_STORE')
-        if os.path.exists(zip_folder):
+            if not success:
+                continue
+            full_path = os.path.join(info.spider.settings.get('FILES_STORE'), file_info['path'])
+            # A zip left on disk by an interrupted run is reported "uptodate" by the
+            # files store but may never have been extracted.
+            if file_info["status"] == "uptodate" and self.has_outputs(None, item):
+                self._remove_zip(full_path)
+                continue
+            if full_path in self.extracting:
+                continue
+            extract_path = item.get("extract_path")
+            os.makedirs(extract_path, exist_ok=True)
+            jobs.append(self._extract(full_path, extract_path))
+
+        return DeferredList(jobs).addCallback(lambda _: item)
+
+    def _resume_tasks(self):
+        # Tasks whose input is gone were finished just before the previous run stopped.
+        zips, doc_paths = [], []
+        for zip_path, (_, extract_path) in self.pending_tasks("extract"):
+            if os.path.exists(zip_path):
+                zips.append((zip_path, extract_path))
+            else:
+                self.finish_task(zip_path)
+        for doc_path, _ in self.pending_tasks("convert"):
+            if os.path.exists(doc_path):
+                doc_paths.append(doc_path)
+            else:
+                self.finish_task(doc_path)
+
+        if zips or doc_paths:
+            log_info(f"Resuming {len(zips)} extractions and {len(doc_paths)} conversions from the previous run")
+        jobs = [self._extract(zip_path, extract_path) for zip_path, extract_path in zips]
+        jobs.append(self._convert_docs(doc_paths))
+        return DeferredList(jobs)
+
+    def _extract(self, zip_path, extract_path):
+        self.extracting.add(zip_path)
+        self.start_task(zip_path, "extract", zip_path, extract_path)
+        d = self.stage.run("extract", extract_nested_zip, zip_path, extract_path, (".doc", ".docx"))
+        d.addCallback(self._extracted, zip_path)
+        d.addCallback(self._convert_docs)
+        d.addErrback(self._extract_failed, zip_path)
+        return d
+
+    def _extracted(self, doc_paths, zip_path):
+        self.extracting.discard(zip_path)
+        for doc_path in doc_paths:
+            if doc_path.lower().endswith(CONVERT_EXTENSIONS):
+                self.start_task(doc_path, "convert", doc_path)
+        self.finish_task(zip_path)
+        self._remove_zip(zip_path)
+        return doc_paths
+
+    def _remove_zip(self, zip_path):
+        if os.path.exists(zip_path):
+            try:
+                os.remove(zip_path)
+            except OSError as e:
+                log_warning(f"Failed to delete {zip_path}: {e}")
+
+    def _extract_failed(self, failure, zip_path):
+        self.extracting.discard(zip_path)
+        self.finish_task(zip_path)
+        log_error(f"Failed to extract {zip_path}: {failure.value}")
+
+    def _convert_docs(self, doc_paths):
+        jobs = []
+        for doc_path in doc_paths:
+            if not doc_path.lower().endswith(CONVERT_EXTENSIONS):
+                continue
+            # A failed submit (e.g. no LibreOffice) must not skip the rest of the zip's
+            # documents or surface as an extraction failure.
             try:
-                shutil.rmtree(zip_folder)
-                log_info(f"Deleted zip folder: {zip_folder}")
+                d = self.stage.track("convert", self.converter.submit(doc_path, remove_source=True))
             except Exception as e:
-                log_error(f"Failed to delete zip folder: {e}")
+                log_error(f"Failed to convert {doc_path} to {CONVERT_FORMAT}: {e}")
+                self.finish_task(doc_path)
+                continue
+            d.addErrback(lambda failure, path=doc_path: log_error(f"Failed to convert {path} to {CONVERT_FORMAT}: {failure.value}"))
+            d.addCallback(lambda _, path=doc_path: self.finish_task(path))
+            jobs.append(d)
+        return DeferredList(jobs)
+
+    @override
+    def close_spider(self, spider):
+        # Work resumed from the previous run is not tied to any item, so the engine
+        # does not wait for it; the pools are only shut down once it has finished.
+        return self.resumed.addBoth(lambda _: self._shutdown(spider))
 
-class ThreeGPPSpider(Spider):
+    def _shutdown(self, spider):
+        self.stage.close()
+        self.converter.shutdown()
+        super().close_spider(spider)
+
+class ThreeGPPSpider(ResumableSpider):
     name = "threegpp"
     allowed_domains = ["3gpp.org"]
 
     custom_settings = {
         "DOWNLOAD_DELAY": 1,
-        "CONCURRENT_REQUESTS": 2,
+        "CONCURRENT_REQUESTS": 16,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 2,
+        "ADAPTIVE_THROTTLE_MAX_CONCURRENCY": 8,
         "USER_AGENT": (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
             "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -144,35 +234,61 @@ class ThreeGPPSpider(Spider):
         "ITEM_PIPELINES": {
             "__main__.ThreeGPPFilesPipeline": 1,
         },
+        "DOWNLOADER_MIDDLEWARES": {
+            "replay.ReplayMiddleware": 950,
+            "throttle.AdaptiveThrottleMiddleware": 900,
+            "resumable.ResumableDownloadMiddleware": 800,
+        },
         "DOWNLOAD_FAIL_ON_DATALOSS": False,
         "RETRY_TIMES": 5,
-        "RETRY_HTTP_CODES": [500, 502, 503, 504, 408],
+        "RETRY_HTTP_CODES": [429, 500, 502, 503, 504, 408],
         "DOWNLOAD_TIMEOUT": 120,
         "FEED_EXPORT_ENCODING": "utf-8",
+        "JOBDIR": os.path.join(CRAWL_JOBS_DIR, name),
+        "EXTENSIONS": {
+            "job_state.JobStateExtension": 0,
+        },
     }
 
     @override
     def start_requests(self):
-        for release in RELEASES:
-            for series in SERIES_LIST:
-                url = f"https://www.3gpp.org/ftp/Specs/latest/{release}/{series}/"
-                yield Request(url, callback=self.parse, errback=self.errback_log, dont_filter=True)
+        if not NEWEST_ONLY:
+            for release in RELEASES:
+                for series in SERIES_LIST:
+                    yield self.listing_request(release, series)
+            return
+
+        # Walk each series from the newest release down, so a spec already taken from a
+        # newer release is never downloaded again in an older one.
+        releases = sorted(RELEASES, key=lambda r: int(r.split("-")[1]), reverse=True)
+        for series in SERIES_LIST:
+            yield self.listing_request(releases[0], series, releases[1:], frozenset())
+
+    def listing_request(self, release, series, older_releases=(), seen_specs=None):
+        url = f"https://www.3gpp.org/ftp/Specs/latest/{release}/{series}/"
+        return Request(
+            url,
+            callback=self.parse,
+            errback=self.errback_log,
+            cb_kwargs={"older_releases": tuple(older_releases), "seen_specs": seen_specs},
+        )
 
     @override
-    def parse(self, response):
+    def parse(self, response, older_releases=(), seen_specs=None):
         release = response.url.split("/")[-3]
         series = response.url.split("/")[-2]
 
-        file_links = response.xpath("//a[contains(@href, '.zip')]/@href").getall()
+        file_links = {os.path.basename(link).lower(): link for link in response.xpath("//a[contains(@href, '.zip')]/@href").getall()}
         log_info(f"Found {len(file_links)} zip files in {release}/{series}")
 
-        for file_link in file_links:
-            file_name = os.path.basename(file_link).lower()
-
-            if not any(ts.replace(".", "") in file_name for ts in IMPORTANT_TS):
+        selected = CATALOG.newest(file_links)
+        items = []
+        for spec, spec_file in selected.items():
+            if seen_specs is not None and spec in seen_specs:
                 continue
 
-            file_url = urljoin(response.url, file_link)
+            file_name = spec_file.file_name
+            file_url = urljoin(response.url, file_links[file_name])
             extract_path = os.path.join(
                 OUTPUT_DIR,
                 release,
@@ -181,16 +297,28 @@ class ThreeGPPSpider(Spider):
             )
             os.makedirs(extract_path, exist_ok=True)
 
-            yield {
+            items.append({
                 "file_name": file_name,
                 "file_urls": [file_url],
                 "release": release,
                 "series": series,
+                "spec": spec,
+                "version": version_label(spec_file.version),
                 "extract_path": extract_path,
-            }
+            })
+
+        yield from self.new_items(items)
+
+        if older_releases:
+            yield self.listing_request(older_releases[0], series, older_releases[1:], seen_specs | selected.keys())
 
     def errback_log(self, failure):
         log_warning(f"Request failed: {failure.request.url} — {repr(failure.value)}")
+
+        older_releases = failure.request.cb_kwargs.get("older_releases")
+        if older_releases:
+            series = failure.request.url.split("/")[-2]
+            yield self.listing_request(older_releases[0], series, older_releases[1:], failure.request.cb_kwargs["seen_specs"])
     
 if __name__ == "__main__":
     from scrapy.crawler import CrawlerProcess
@@ -1,10 +1,19 @@
 import arxiv
 import os
+import re
 import requests
-import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from utils.logger import *
-from config import RAW_DATA_PATH
+from config import RAW_DATA_PATH, ARXIV_INDEX_PATH
+from arxiv_index import ArxivIndex
+from prescreen import ScreeningStats, relevance_score
+from arxiv_source import NoLatexSource, download_source, source_url_for
+from replay import REPLAY_URL, to_replay_url
 
 OUTPUT_DIR = os.path.join(RAW_DATA_PATH, "arxiv")
 
@@ -12,48 +21,183 @@ QUERY = '"4G" OR "5G" OR "6G" OR "telecommunication" OR "network slicing" OR "be
 
 MAX_RESULTS = 200
 
+# Upper bound on new papers fetched by one incremental run; the rest follow next run.
+INCREMENTAL_MAX_RESULTS = 1000
+
+DOWNLOAD_WORKERS = 4
+
+# Fetch the LaTeX e-print and store it flattened as <title>.tex, which the preprocessor
+# parses without PDF layout reconstruction; papers without source fall back to the PDF.
+SOURCE_MODE = False
+
+# Papers whose title/abstract/category score is below the threshold are not downloaded.
+PRESCREEN = True
+PRESCREEN_THRESHOLD = 0.35
+
 client = arxiv.Client(
     page_size=100,
     delay_seconds=4,
     num_retries=5
 )
+if REPLAY_URL:
+    client.query_url_format = to_replay_url(arxiv.Client.query_url_format.replace("?{}", "")) + "?{}"
 
-def crawlers():
+def create_session(workers=DOWNLOAD_WORKERS):
+    session = requests.Session()
+    retry = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def download_pdf(session, pdf_url, pdf_path):
+    tmp_path = pdf_path + ".part"
     try:
-        search = arxiv.Search(
+        with session.get(pdf_url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            with open(tmp_path, "wb") as pdf_file:
+                for chunk in response.iter_content(chunk_size=65536):
+                    if chunk:
+                        pdf_file.write(chunk)
+        os.replace(tmp_path, pdf_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return pdf_path
+
+def download_paper(session, pdf_url, pdf_path):
+    if SOURCE_MODE:
+        tex_path = os.path.splitext(pdf_path)[0] + ".tex"
+        try:
+            return download_source(session, to_replay_url(source_url_for(pdf_url)), tex_path)
+        except NoLatexSource as e:
+            log_info(f"No LaTeX source for {pdf_url} ({e}), downloading the PDF")
+    return download_pdf(session, to_replay_url(pdf_url), pdf_path)
+
+def _log_download(pdf_url, future):
+    try:
+        log_info(f"Downloaded: {future.result()}")
+    except Exception as e:
+        log_error(f"Failed to download {pdf_url}: {e}")
+
+def paper_id(result):
+    return re.sub(r"v\d+$", "", result.get_short_id())
+
+def output_paths(pdf_path):
+    # Every file download_paper may write (and the index store) for a paper: in
+    # SOURCE_MODE the .tex, or the PDF when the paper has no LaTeX source.
+    if SOURCE_MODE:
+        return [os.path.splitext(pdf_path)[0] + ".tex", pdf_path]
+    return [pdf_path]
+
+def paper_path(index, arxiv_id, title):
+    # Sanitised titles can collide; a file already owned by another paper gets the id appended.
+    pdf_path = os.path.join(OUTPUT_DIR, f"{title}.pdf")
+    owners = {index.owner_of(path) for path in output_paths(pdf_path)}
+    if owners - {None, arxiv_id}:
+        pdf_path = os.path.join(OUTPUT_DIR, f"{title}_{arxiv_id}.pdf")
+    return pdf_path
+
+def should_skip(entry):
+    # Rejected papers are screened again when the threshold was lowered or screening is off.
+    if entry is None:
+        return False
+    if entry["status"] != "rejected":
+        return True
+    return PRESCREEN and (entry["score"] or 0.0) < PRESCREEN_THRESHOLD
+
+def build_search(cursor):
+    # First run: seed with the top relevance results. Afterwards only papers submitted
+    # since the cursor are requested, oldest first so the cursor can advance safely.
+    if cursor is None:
+        return arxiv.Search(
             query=QUERY,
             sort_by=arxiv.SortCriterion.Relevance,
             sort_order=arxiv.SortOrder.Descending,
             max_results=MAX_RESULTS
         )
+    now = datetime.now(timezone.utc)
+    return arxiv.Search(
+        query=f"({QUERY}) AND submittedDate:[{cursor:%Y%m%d%H%M} TO {now:%Y%m%d%H%M}]",
+        sort_by=arxiv.SortCriterion.SubmittedDate,
+        sort_order=arxiv.SortOrder.Ascending,
+        max_results=INCREMENTAL_MAX_RESULTS
+    )
 
-        for result in client.results(search):
-            title = result.title.replace(" ", "_").replace("/", "_").replace(":", "_")
-            pdf_url = result.pdf_url
-            pdf_path = os.path.join(OUTPUT_DIR, f"{title}.pdf")
+def crawlers():
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    session = create_session()
+    index = ArxivIndex(ARXIV_INDEX_PATH)
+    cursor = index.cursor(QUERY)
+    last_submitted = cursor
+    downloads = {}
+    screening = ScreeningStats()
 
-            if os.path.exists(pdf_path):
-                log_info(f"Skipped (already exists): {title}")
-                continue
+    # The client's delay_seconds keeps metadata paging polite; PDF downloads run
+    # concurrently on the pooled session.
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        def submit(arxiv_id, pdf_url, pdf_path):
+            future = executor.submit(download_paper, session, pdf_url, pdf_path)
+            future.add_done_callback(partial(_log_download, pdf_url))
+            downloads[arxiv_id] = future
 
-            try:
-                response = requests.get(pdf_url, stream=True, timeout=30)
-                response.raise_for_status()
+        for paper in index.unfinished():
+            log_info(f"Retrying unfinished download: {paper['arxiv_id']} ({paper['attempts'] or 0} failed attempts)")
+            submit(paper["arxiv_id"], paper["pdf_url"], paper["path"])
 
-                with open(pdf_path, "wb") as pdf_file:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            pdf_file.write(chunk)
+        try:
+            log_info(f"Harvesting arXiv {'since ' + cursor.isoformat() if cursor else 'top results'}")
+            for result in client.results(build_search(cursor)):
+                if last_submitted is None or result.published > last_submitted:
+                    last_submitted = result.published
 
-                log_info(f"Downloaded: {pdf_path}")
-                time.sleep(1)
-            except Exception as e:
-                log_error(f"Failed to download {pdf_url}: {e}")
+                arxiv_id = paper_id(result)
+                if should_skip(index.get(arxiv_id)):
+                    continue
 
-    except arxiv.UnexpectedEmptyPageError as e:
-        log_warning(f"Unexpected empty page: {e}")
-    except Exception as e:
-        log_error(f"An error occurred: {e}")
+                title = result.title.replace(" ", "_").replace("/", "_").replace(":", "_")
+                pdf_path = paper_path(index, arxiv_id, title)
+                score = relevance_score(result.title, result.summary, result.categories)
+
+                paths = output_paths(pdf_path)
+                existing = next((path for path in paths if os.path.exists(path)), None)
+                if existing and not any(index.owner_of(path) for path in paths):
+                    # Downloaded before the index existed.
+                    index.record(arxiv_id, result.title, result.pdf_url, existing, result.published, "downloaded", score)
+                    continue
+
+                if PRESCREEN:
+                    screening.add(score >= PRESCREEN_THRESHOLD)
+                    if score < PRESCREEN_THRESHOLD:
+                        index.record(arxiv_id, result.title, result.pdf_url, pdf_path, result.published, "rejected", score)
+                        log_info(f"Pre-screen rejected ({score:.2f}): {result.title}")
+                        continue
+
+                index.record(arxiv_id, result.title, result.pdf_url, pdf_path, result.published, "pending", score)
+                submit(arxiv_id, result.pdf_url, pdf_path)
+
+        except arxiv.UnexpectedEmptyPageError as e:
+            log_warning(f"Unexpected empty page: {e}")
+        except Exception as e:
+            log_error(f"An error occurred: {e}")
+
+    sizes = []
+    for arxiv_id, future in downloads.items():
+        if future.exception():
+            index.set_status(arxiv_id, "failed")
+            continue
+        index.set_status(arxiv_id, "downloaded", future.result())
+        if future.result().endswith(".pdf"):
+            sizes.append(os.path.getsize(future.result()))
+    if PRESCREEN:
+        log_info(screening.summary(sum(sizes) / len(sizes) / 1024 / 1024 if sizes else None))
+    if last_submitted and last_submitted != cursor:
+        index.set_cursor(QUERY, last_submitted)
+
+    log_info(f"arXiv harvest: {len(downloads)} downloads, cursor at {last_submitted}")
+    index.close()
+    session.close()
 
 if __name__ == "__main__":
     log_info("Starting crawl paper from arxiv")
@@ -0,0 +1,101 @@
+from datetime import datetime
+import os
+import sys
+import time
+import sqlite3
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from config import ARXIV_INDEX_PATH
+
+# Failed downloads are retried on later runs until they have failed this often (404,
+# withdrawn paper, unreadable e-print).
+MAX_ATTEMPTS = 3
+
+# Papers are keyed by arXiv id without version, so a re-titled or revised paper is
+# still recognised; cursors hold the newest submission date harvested per query.
+class ArxivIndex:
+    def __init__(self, db_path=ARXIV_INDEX_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS papers (
+                arxiv_id TEXT PRIMARY KEY,
+                title TEXT,
+                pdf_url TEXT,
+                path TEXT,
+                published TEXT,
+                status TEXT,
+                score REAL,
+                updated_at REAL,
+                attempts INTEGER DEFAULT 0
+            )
+            """
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(papers)")}
+        if "score" not in columns:
+            self.conn.execute("ALTER TABLE papers ADD COLUMN score REAL")
+        if "attempts" not in columns:
+            self.conn.execute("ALTER TABLE papers ADD COLUMN attempts INTEGER DEFAULT 0")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cursors (
+                query TEXT PRIMARY KEY,
+                last_submitted TEXT
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get(self, arxiv_id):
+        row = self.conn.execute("SELECT * FROM papers WHERE arxiv_id = ?", (arxiv_id,)).fetchone()
+        return dict(row) if row else None
+
+    def owner_of(self, path):
+        row = self.conn.execute("SELECT arxiv_id FROM papers WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, arxiv_id, title, pdf_url, path, published, status, score=None):
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO papers (arxiv_id, title, pdf_url, path, published, status, score, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (arxiv_id, title, pdf_url, path, published.isoformat(), status, score, time.time()),
+        )
+        self.conn.commit()
+
+    def set_status(self, arxiv_id, status, path=None):
+        self.conn.execute(
+            """
+            UPDATE papers
+            SET status = ?, path = COALESCE(?, path), updated_at = ?,
+                attempts = COALESCE(attempts, 0) + (? = 'failed')
+            WHERE arxiv_id = ?
+            """,
+            (status, path, time.time(), status, arxiv_id),
+        )
+        self.conn.commit()
+
+    def unfinished(self, max_attempts=MAX_ATTEMPTS):
+        rows = self.conn.execute(
+            "SELECT * FROM papers WHERE status IN ('pending', 'failed') AND COALESCE(attempts, 0) < ?",
+            (max_attempts,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def cursor(self, query):
+        row = self.conn.execute("SELECT last_submitted FROM cursors WHERE query = ?", (query,)).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def set_cursor(self, query, last_submitted):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO cursors (query, last_submitted) VALUES (?, ?)",
+            (query, last_submitted.isoformat()),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
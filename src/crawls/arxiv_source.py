@@ -0,0 +1,85 @@
+import gzip
+import io
+import os
+import posixpath
+import re
+import tarfile
+
+INPUT_RE = re.compile(r"\\(?:input|include)\s*\{([^}]+)\}")
+MAX_INPUT_DEPTH = 10
+
+class NoLatexSource(Exception):
+    pass
+
+
+def source_url_for(pdf_url):
+    return pdf_url.replace("/pdf/", "/e-print/")
+
+
+def _read_tex_files(payload):
+    # An e-print is a gzipped tarball, a single gzipped .tex file, or just the PDF
+    # when the authors did not submit source.
+    if payload[:4] == b"%PDF":
+        raise NoLatexSource("e-print is a PDF")
+    try:
+        with tarfile.open(fileobj=io.BytesIO(payload), mode="r:*") as archive:
+            return {
+                posixpath.normpath(member.name): archive.extractfile(member).read().decode("utf-8", errors="replace")
+                for member in archive.getmembers()
+                if member.isfile() and member.name.lower().endswith((".tex", ".aux"))
+            }
+    except tarfile.ReadError:
+        pass
+    try:
+        payload = gzip.decompress(payload)
+    except OSError:
+        pass
+    if payload[:4] == b"%PDF":
+        raise NoLatexSource("e-print is a PDF")
+    return {"main.tex": payload.decode("utf-8", errors="replace")}
+
+
+def _main_file(files):
+    candidates = [name for name, text in files.items() if "\\documentclass" in text]
+    with_body = [name for name in candidates if "\\begin{document}" in files[name]]
+    candidates = with_body or candidates
+    if not candidates:
+        raise NoLatexSource("no \\documentclass in source")
+    # Prefer the largest root document (e.g. over a standalone figure file).
+    return max(candidates, key=lambda name: len(files[name]))
+
+
+def flatten_latex(files, name, depth=0):
+    base_dir = posixpath.dirname(name)
+
+    def inline(m):
+        target = m.group(1).strip()
+        if not target.endswith(".tex"):
+            target += ".tex"
+        for path in (posixpath.normpath(posixpath.join(base_dir, target)), posixpath.normpath(target)):
+            if path in files and depth < MAX_INPUT_DEPTH:
+                return flatten_latex(files, path, depth + 1)
+        return ""
+
+    return INPUT_RE.sub(inline, files[name])
+
+
+def download_source(session, source_url, tex_path):
+    response = session.get(source_url, timeout=60)
+    response.raise_for_status()
+    files = _read_tex_files(response.content)
+    main = _main_file(files)
+    text = flatten_latex(files, main)
+
+    # A compiled .aux, when the authors shipped one, lets the parser number tables
+    # from their \label instead of leaving them unnumbered.
+    outputs = [(tex_path, text)]
+    aux = files.get(posixpath.splitext(main)[0] + ".aux")
+    if aux:
+        outputs.append((os.path.splitext(tex_path)[0] + ".aux", aux))
+    for path, data in outputs:
+        tmp_path = path + ".part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return tex_path
@@ -0,0 +1,122 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from utils.logger import *
+import replay
+
+SPIDERS = {
+    "threegpp": ("3gpp_crawler", "ThreeGPPSpider"),
+    "itu": ("itu_crawler", "ItuSpider"),
+    "mst": ("vn_spec_crawler", "VnSpecSpider"),
+}
+
+def _rate(value, elapsed):
+    return round(value / elapsed, 2) if elapsed > 0 else 0.0
+
+def spider_report(name, stats):
+    elapsed = (stats["finish_time"] - stats["start_time"]).total_seconds()
+    report = {
+        "spider": name,
+        "elapsed_s": round(elapsed, 2),
+        "pages_per_s": _rate(stats.get("downloader/response_count", 0), elapsed),
+        "bytes_per_s": _rate(stats.get("downloader/response_bytes", 0), elapsed),
+        "items_per_s": _rate(stats.get("item_scraped_count", 0), elapsed),
+    }
+    for key, value in stats.items():
+        if key.startswith("post_download/") and key.endswith(("/jobs", "/latency_avg", "/latency_max", "/max_queue_depth")):
+            report[key] = round(value, 3) if isinstance(value, float) else value
+    for key in [k for k in report if k.endswith("/jobs")]:
+        report[key.replace("/jobs", "/jobs_per_s")] = _rate(report[key], elapsed)
+    return report
+
+def load_spider(name, workdir):
+    module_name, class_name = SPIDERS[name]
+    module = importlib.import_module(module_name)
+    spider_cls = getattr(module, class_name)
+
+    # Keep benchmark output away from data/ and load pipelines from the spider module
+    # rather than __main__.
+    module.OUTPUT_DIR = os.path.join(workdir, name)
+    settings = dict(spider_cls.custom_settings)
+    settings["ITEM_PIPELINES"] = {
+        path.replace("__main__.", f"{module_name}."): order
+        for path, order in settings.get("ITEM_PIPELINES", {}).items()
+    }
+    settings["FILES_STORE"] = os.path.join(workdir, name, "files")
+    settings["CRAWL_MANIFEST_PATH"] = os.path.join(workdir, f"{name}_manifest.sqlite")
+    settings["JOBDIR"] = os.path.join(workdir, "jobs", name)
+    settings["ROBOTSTXT_OBEY"] = False
+    settings["CRAWL_REPLAY_URL"] = replay.REPLAY_URL
+    spider_cls.custom_settings = settings
+    return spider_cls
+
+def run_spiders(names, workdir):
+    from scrapy.crawler import CrawlerProcess
+    from twisted.internet import defer
+
+    process = CrawlerProcess({"LOG_LEVEL": "WARNING"})
+    reports = []
+
+    @defer.inlineCallbacks
+    def run_all():
+        try:
+            for name in names:
+                crawler = process.create_crawler(load_spider(name, workdir))
+                yield process.crawl(crawler)
+                reports.append(spider_report(name, crawler.stats.get_stats()))
+        finally:
+            from twisted.internet import reactor
+            reactor.stop()
+
+    run_all()
+    process.start(stop_after_crawl=False)
+    return reports
+
+def run_arxiv(workdir):
+    arxiv_crawler = importlib.import_module("arxiv_crawler")
+    arxiv_crawler.OUTPUT_DIR = os.path.join(workdir, "arxiv")
+    arxiv_crawler.ARXIV_INDEX_PATH = os.path.join(workdir, "arxiv_index.sqlite")
+
+    started = time.monotonic()
+    arxiv_crawler.crawlers()
+    elapsed = time.monotonic() - started
+
+    files = os.listdir(arxiv_crawler.OUTPUT_DIR) if os.path.exists(arxiv_crawler.OUTPUT_DIR) else []
+    size = sum(os.path.getsize(os.path.join(arxiv_crawler.OUTPUT_DIR, f)) for f in files)
+    return {
+        "spider": "arxiv",
+        "elapsed_s": round(elapsed, 2),
+        "items_per_s": _rate(len(files), elapsed),
+        "bytes_per_s": _rate(size, elapsed),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark crawlers against recorded fixtures.")
+    parser.add_argument("fixtures_dir")
+    parser.add_argument("--spider", choices=[*SPIDERS, "arxiv", "all"], default="all")
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    args = parser.parse_args()
+
+    server, replay_url = replay.start_replay_server(args.fixtures_dir)
+    replay.REPLAY_URL = replay_url
+    workdir = tempfile.mkdtemp(prefix="crawl_bench_")
+    log_info(f"Replaying {args.fixtures_dir} on {replay_url}, writing to {workdir}")
+
+    names = list(SPIDERS) if args.spider == "all" else [n for n in [args.spider] if n in SPIDERS]
+    reports = run_spiders(names, workdir) if names else []
+    if args.spider in ("arxiv", "all"):
+        reports.append(run_arxiv(workdir))
+    server.shutdown()
+
+    for report in reports:
+        log_info(json.dumps(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=4)
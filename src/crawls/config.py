@@ -6,4 +6,7 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")
 with open(os.path.join(PROJECT_ROOT, "config/path.yaml"), "r", encoding="utf-8") as f:
     config = yaml.safe_load(f)
 
-RAW_DATA_PATH = config["raw"]
\ No newline at end of file
+RAW_DATA_PATH = config["raw"]
+CRAWL_MANIFEST_PATH = config.get("crawl_manifest", "data/crawl_manifest.sqlite")
+CRAWL_JOBS_DIR = config.get("crawl_jobs", "data/crawl_jobs/")
+ARXIV_INDEX_PATH = config.get("arxiv_index", "data/arxiv_index.sqlite")
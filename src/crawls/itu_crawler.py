@@ -1,5 +1,5 @@
-from scrapy import Spider, Request
-from scrapy.pipelines.files import FilesPipeline
+from scrapy import Request
+from collections import namedtuple
 from typing import override
 import os
 import sys
@@ -7,8 +7,10 @@ import re
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
 
-from config import RAW_DATA_PATH
+from config import RAW_DATA_PATH, CRAWL_JOBS_DIR
 from utils.logger import *
+from manifest import ManifestFilesPipeline
+from job_state import ResumableSpider
 
 OUTPUT_DIR = os.path.join(RAW_DATA_PATH, "itu_spec")
 
@@ -36,24 +38,55 @@ ITU_SERIES = {
     ]
 }
 
-class ItuFilesPipeline(FilesPipeline):
+# Download every edition (including superseded ones and amendments) instead of only
+# the edition in force.
+ALL_EDITIONS = False
+
+# Edition links look like T-REC-G.1000-200111-I/en: publication date (YYYYMM) and a
+# status letter (I = in force, S = superseded, W = withdrawn), optionally followed by
+# !Amd1, !Cor1, !Sup... for amendments, corrigenda and supplements. "!!PDF-E" download
+# links do not match.
+EDITION_RE = re.compile(r"T-REC-([A-Z])\.(\d+)-(\d{6})-([A-Z])(?:!([A-Za-z]+\d*))?(?=/|$|&)")
+
+Edition = namedtuple("Edition", ["series", "number", "date", "status", "suffix", "url"])
+
+def parse_edition_link(url):
+    m = EDITION_RE.search(url)
+    if not m:
+        return None
+    series, number, date, status, suffix = m.groups()
+    return Edition(series, number, date, status, suffix, url)
+
+def select_editions(editions, series, number, all_editions=False):
+    editions = [e for e in editions if e.series == series and e.number == number]
+    if all_editions:
+        return sorted(editions, key=lambda e: (e.date, e.suffix or ""))
+    in_force = [e for e in editions if e.status == "I" and not e.suffix]
+    return [max(in_force, key=lambda e: e.date)] if in_force else []
+
+
+class ItuFilesPipeline(ManifestFilesPipeline):
     def file_path(self, request, response=None, info=None, *, item=None):
         series = item.get("series", "unknown_series")
         number = item.get("number", "unknown_number")
 
         filename = f"{series}.{number}.pdf"
+        if ALL_EDITIONS and item.get("edition"):
+            filename = f"{series}.{number}-{item['edition']}.pdf"
 
         path = os.path.join(series, number, filename)
         return path
 
-class ItuSpider(Spider):
+class ItuSpider(ResumableSpider):
     name = "itu"
     allowed_domains = ["www.itu.int"]
 
     custom_settings = {
         "FILES_STORE": OUTPUT_DIR,
         "DOWNLOAD_DELAY": 1,
-        "CONCURRENT_REQUESTS": 2,
+        "CONCURRENT_REQUESTS": 16,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 2,
+        "ADAPTIVE_THROTTLE_MAX_CONCURRENCY": 8,
         "USER_AGENT": (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
             "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -62,11 +95,20 @@ class ItuSpider(Spider):
         "ROBOTSTXT_OBEY": True,
         "DOWNLOAD_FAIL_ON_DATALOSS": False,
         "RETRY_TIMES": 5,
-        "RETRY_HTTP_CODES": [500, 502, 503, 504, 408],
+        "RETRY_HTTP_CODES": [429, 500, 502, 503, 504, 408],
         "DOWNLOAD_TIMEOUT": 120,
         "ITEM_PIPELINES": {
             "__main__.ItuFilesPipeline": 1
         },
+        "DOWNLOADER_MIDDLEWARES": {
+            "replay.ReplayMiddleware": 950,
+            "throttle.AdaptiveThrottleMiddleware": 900,
+            "resumable.ResumableDownloadMiddleware": 800,
+        },
+        "JOBDIR": os.path.join(CRAWL_JOBS_DIR, name),
+        "EXTENSIONS": {
+            "job_state.JobStateExtension": 0,
+        },
     }
 
     @override
@@ -74,42 +116,49 @@ class ItuSpider(Spider):
         for series, numbers in ITU_SERIES.items():
             for number in numbers:
                 url = f"https://www.itu.int/rec/T-REC-{series}.{number}/en"
-                yield Request(url, callback=self.parse, dont_filter=True)
+                yield Request(url, callback=self.parse, cb_kwargs={"series": series, "number": number})
 
-    def parse(self, response):
+    def parse(self, response, series, number):
         rec_links = response.xpath('//a[contains(@href,"T-REC")]/@href').getall()
-        rec_links = [response.urljoin(link) for link in rec_links]
+        editions = {}
+        for link in rec_links:
+            edition = parse_edition_link(response.urljoin(link))
+            if edition:
+                editions.setdefault(edition[:5], edition)
 
-        log_info(f"Found {len(rec_links)} recommendation links on {response.url}")
+        selected = select_editions(editions.values(), series, number, ALL_EDITIONS)
+        log_info(f"Found {len(editions)} editions on {response.url}, fetching {len(selected)}")
+        if not selected:
+            log_warning(f"No edition of {series}.{number} is in force")
 
-        for link in rec_links:
+        # Several links on a page point at the same edition; the dupefilter drops repeats.
+        for edition in selected:
             yield Request(
-                link,
+                edition.url,
                 callback=self.parse_pdf,
+                cb_kwargs={"edition": edition._asdict()},
                 meta={"source_url": response.url},
-                dont_filter=True
             )
 
-    def parse_pdf(self, response):
+    def parse_pdf(self, response, edition):
         pdf_links = response.xpath('//a[contains(@href,"lang=e") and contains(., "PDF")]/@href').getall()
-        pdf_links = [response.urljoin(link) for link in pdf_links]
+        pdf_links = list(dict.fromkeys(response.urljoin(link) for link in pdf_links))
 
         log_info(f"Found {len(pdf_links)} PDF-E files on {response.url}")
 
-        series, number = None, None
-        m = re.search(r"T-REC-([A-Z])\.(\d+)", response.url)
-        if m:
-            series = m.group(1)
-            number = m.group(2)
-
-        for link in pdf_links:
-            yield {
+        label = edition["date"] + (f"-{edition['suffix']}" if edition["suffix"] else "")
+        yield from self.new_items([
+            {
                 "file_urls": [link],
-                "series": series,
-                "number": number,
+                "series": edition["series"],
+                "number": edition["number"],
+                "edition": label,
+                "status": edition["status"],
                 "language": "en",
                 "source_url": response.meta.get("source_url"),
             }
+            for link in pdf_links
+        ])
 
 if __name__ == "__main__":
     from scrapy.crawler import CrawlerProcess
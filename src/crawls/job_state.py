@@ -0,0 +1,150 @@
+from scrapy import Spider, signals
+from scrapy.exceptions import NotConfigured
+import json
+import os
+import sys
+import time
+import shutil
+import sqlite3
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from utils.logger import *
+
+JOB_STATE_FILE = "job_state.sqlite"
+FINISHED_MARKER = "finished"
+
+def item_key(item):
+    return item["file_urls"][0]
+
+
+# Everything Scrapy's JOBDIR does not persist: items handed to the pipelines whose
+# files are not fully processed yet, and post-download work (extraction, conversion)
+# that was queued but not finished when the crawl stopped.
+class JobState:
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS items (
+                key TEXT PRIMARY KEY,
+                item TEXT,
+                done INTEGER DEFAULT 0,
+                updated_at REAL
+            )
+            """
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                key TEXT PRIMARY KEY,
+                stage TEXT,
+                args TEXT,
+                created_at REAL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def is_done(self, key):
+        row = self.conn.execute("SELECT done FROM items WHERE key = ?", (key,)).fetchone()
+        return bool(row and row[0])
+
+    def add_items(self, items):
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO items (key, item, done, updated_at) VALUES (?, ?, 0, ?)",
+            [(item_key(item), json.dumps(item, ensure_ascii=False), time.time()) for item in items],
+        )
+        self.conn.commit()
+
+    def mark_done(self, key):
+        self.conn.execute("UPDATE items SET done = 1, updated_at = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+
+    def pending_items(self):
+        rows = self.conn.execute("SELECT item FROM items WHERE done = 0 ORDER BY updated_at").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def add_task(self, key, stage, *args):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO tasks (key, stage, args, created_at) VALUES (?, ?, ?, ?)",
+            (key, stage, json.dumps(args), time.time()),
+        )
+        self.conn.commit()
+
+    def finish_task(self, key):
+        self.conn.execute("DELETE FROM tasks WHERE key = ?", (key,))
+        self.conn.commit()
+
+    def pending_tasks(self, stage):
+        rows = self.conn.execute("SELECT key, args FROM tasks WHERE stage = ? ORDER BY created_at", (stage,)).fetchall()
+        return [(key, json.loads(args)) for key, args in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def open_job_state(settings):
+    jobdir = settings.get("JOBDIR")
+    return JobState(os.path.join(jobdir, JOB_STATE_FILE)) if jobdir else None
+
+
+class JobStateExtension:
+    # A JOBDIR left by a crawl that ran to completion would filter every request of
+    # the next run as already seen, so it is cleared before the scheduler loads it.
+    def __init__(self, jobdir):
+        self.jobdir = jobdir
+        if os.path.exists(os.path.join(jobdir, FINISHED_MARKER)):
+            shutil.rmtree(jobdir, ignore_errors=True)
+            log_info(f"Previous crawl in {jobdir} finished, starting a new one")
+        elif os.path.isdir(jobdir):
+            log_info(f"Resuming crawl from {jobdir}")
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        jobdir = crawler.settings.get("JOBDIR")
+        if not jobdir:
+            raise NotConfigured
+        extension = cls(jobdir)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def spider_closed(self, spider, reason):
+        if reason == "finished":
+            os.makedirs(self.jobdir, exist_ok=True)
+            with open(os.path.join(self.jobdir, FINISHED_MARKER), "w") as f:
+                f.write(str(time.time()))
+
+
+class ResumableSpider(Spider):
+    _job_state = None
+
+    @property
+    def job_state(self):
+        if self._job_state is None:
+            self._job_state = open_job_state(self.crawler.settings)
+        return self._job_state
+
+    async def start(self):
+        # Items already handed to the pipelines before a restart are re-emitted first;
+        # their listing pages are in the persisted dupefilter and won't be crawled again.
+        if self.job_state:
+            pending = self.job_state.pending_items()
+            if pending:
+                log_info(f"Re-queueing {len(pending)} unfinished items from the previous run")
+            for item in pending:
+                yield item
+        async for item_or_request in super().start():
+            yield item_or_request
+
+    def new_items(self, items):
+        if not self.job_state:
+            return items
+        items = [item for item in items if not self.job_state.is_done(item_key(item))]
+        self.job_state.add_items(items)
+        return items
+
+    def closed(self, reason):
+        if self._job_state:
+            self._job_state.close()
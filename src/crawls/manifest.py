@@ -0,0 +1,166 @@
+from scrapy.pipelines.files import FilesPipeline, FileException
+from typing import override
+import hashlib
+import os
+import sys
+import time
+import sqlite3
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from utils.logger import *
+from config import CRAWL_MANIFEST_PATH
+from job_state import open_job_state, item_key
+
+class CrawlManifest:
+    def __init__(self, db_path=CRAWL_MANIFEST_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS artifacts (
+                url TEXT PRIMARY KEY,
+                spider TEXT,
+                path TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER,
+                content_hash TEXT,
+                fetched_at REAL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get(self, url):
+        row = self.conn.execute("SELECT * FROM artifacts WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def conditional_headers(self, url):
+        entry = self.get(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, url, spider, path, etag, last_modified, size, content_hash):
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO artifacts
+                (url, spider, path, etag, last_modified, size, content_hash, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (url, spider, path, etag, last_modified, size, content_hash, time.time()),
+        )
+        self.conn.commit()
+
+    def touch(self, url):
+        self.conn.execute("UPDATE artifacts SET fetched_at = ? WHERE url = ?", (time.time(), url))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def _header(response, name):
+    value = response.headers.get(name)
+    return value.decode("latin-1") if value else None
+
+
+class ManifestFilesPipeline(FilesPipeline):
+    @override
+    def open_spider(self, spider):
+        super().open_spider(spider)
+        self.manifest = CrawlManifest(spider.settings.get("CRAWL_MANIFEST_PATH", CRAWL_MANIFEST_PATH))
+        self.job_state = open_job_state(spider.settings)
+        self.failed_urls = set()
+
+    def close_spider(self, spider):
+        self.manifest.close()
+        if self.job_state:
+            self.job_state.close()
+
+    @override
+    def process_item(self, item, spider):
+        # item_completed may return a Deferred for post-download work, so the item is
+        # only marked done once that has finished too.
+        d = super().process_item(item, spider)
+        if self.job_state:
+            d.addCallback(self._mark_done)
+        return d
+
+    def start_task(self, key, stage, *args):
+        if self.job_state:
+            self.job_state.add_task(key, stage, *args)
+
+    def finish_task(self, key):
+        if self.job_state:
+            self.job_state.finish_task(key)
+
+    def pending_tasks(self, stage):
+        return self.job_state.pending_tasks(stage) if self.job_state else []
+
+    def _mark_done(self, item):
+        if not any(url in self.failed_urls for url in item.get("file_urls", [])):
+            self.job_state.mark_done(item_key(item))
+        return item
+
+    @override
+    def media_failed(self, failure, request, info):
+        self.failed_urls.add(request.url)
+        return super().media_failed(failure, request, info)
+
+    def has_outputs(self, request, item):
+        # Conditional headers are only sent when the artifacts built from the last
+        # download are still on disk; otherwise a 304 would leave nothing to reuse.
+        return os.path.exists(os.path.join(self.store.basedir, self.file_path(request, item=item)))
+
+    @override
+    def get_media_requests(self, item, info):
+        for request in super().get_media_requests(item, info):
+            if self.has_outputs(request, item):
+                for name, value in self.manifest.conditional_headers(request.url).items():
+                    request.headers[name] = value
+            request.meta["resumable"] = True
+            yield request
+
+    @override
+    def media_downloaded(self, response, request, info, *, item=None):
+        if response.status == 304:
+            entry = self.manifest.get(request.url)
+            self.manifest.touch(request.url)
+            self.inc_stats(info.spider, "uptodate")
+            return {
+                "url": request.url,
+                "path": entry["path"] if entry else self.file_path(request, item=item),
+                "checksum": entry["content_hash"] if entry else None,
+                "status": "uptodate",
+            }
+
+        previous = self.manifest.get(request.url)
+        if "resumed" in response.flags and previous and previous["etag"] and previous["etag"] == _header(response, "ETag"):
+            # Same ETag as the last complete download, so a stitched body must hash the same.
+            if hashlib.md5(response.body).hexdigest() != previous["content_hash"]:
+                log_warning(f"Resumed download of {request.url} does not match the recorded hash")
+                raise FileException("resumed download failed hash verification")
+
+        result = super().media_downloaded(response, request, info, item=item)
+
+        if previous and previous["content_hash"] == result["checksum"] and self.has_outputs(request, item):
+            result["status"] = "uptodate"
+
+        self.manifest.record(
+            request.url,
+            info.spider.name,
+            result["path"],
+            _header(response, "ETag"),
+            _header(response, "Last-Modified"),
+            len(response.body),
+            result["checksum"],
+        )
+        return result
@@ -0,0 +1,72 @@
+from concurrent.futures import ProcessPoolExecutor
+from twisted.internet.defer import Deferred
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from utils.logger import *
+
+def deferred_from_future(future):
+    # Imported lazily so that importing this module never installs the default reactor.
+    from twisted.internet import reactor
+
+    d = Deferred()
+
+    def _done(f):
+        error = f.exception()
+        if error is not None:
+            reactor.callFromThread(d.errback, error)
+        else:
+            reactor.callFromThread(d.callback, f.result())
+
+    future.add_done_callback(_done)
+    return d
+
+
+# The process pool is started on the first run(); a stage that only track()s futures
+# from elsewhere (e.g. the LibreOffice converter) never starts one.
+class PostDownloadStage:
+    def __init__(self, stats, workers=None):
+        self.stats = stats
+        self.workers = workers
+        self.executor = None
+        self.depth = {}
+
+    def run(self, stage, fn, *args):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self.track(stage, self.executor.submit(fn, *args))
+
+    def track(self, stage, future):
+        self.depth[stage] = self.depth.get(stage, 0) + 1
+        self.stats.set_value(f"post_download/{stage}/queue_depth", self.depth[stage])
+        self.stats.max_value(f"post_download/{stage}/max_queue_depth", self.depth[stage])
+
+        d = deferred_from_future(future)
+        d.addBoth(self._finished, stage, time.monotonic())
+        return d
+
+    def _finished(self, result, stage, started):
+        latency = time.monotonic() - started
+        self.depth[stage] -= 1
+        self.stats.set_value(f"post_download/{stage}/queue_depth", self.depth[stage])
+        self.stats.inc_value(f"post_download/{stage}/jobs")
+        self.stats.inc_value(f"post_download/{stage}/latency_total", latency)
+        self.stats.max_value(f"post_download/{stage}/latency_max", latency)
+        return result
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        for stage in self.depth:
+            jobs = self.stats.get_value(f"post_download/{stage}/jobs", 0)
+            total = self.stats.get_value(f"post_download/{stage}/latency_total", 0.0)
+            if jobs:
+                self.stats.set_value(f"post_download/{stage}/latency_avg", total / jobs)
+                log_info(f"Post-download {stage}: {jobs} jobs, avg latency {total / jobs:.2f}s")
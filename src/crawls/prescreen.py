@@ -0,0 +1,74 @@
+import math
+import re
+
+# Weighted telecom vocabulary; each term contributes weight * (1 + ln(tf)) so a term
+# repeated in the abstract counts more, but with diminishing returns.
+KEYWORDS = {
+    "3gpp": 3.0, "5g": 3.0, "6g": 3.0, "4g": 2.0, "lte": 3.0, "new radio": 3.0,
+    "5g nr": 3.0, "o-ran": 3.0, "open ran": 3.0, "ran": 2.0, "radio access network": 3.0,
+    "core network": 3.0, "network slicing": 3.0, "urllc": 3.0, "embb": 3.0, "mmtc": 3.0,
+    "handover": 3.0, "user equipment": 2.0, "base station": 2.0, "gnb": 3.0, "enodeb": 3.0,
+    "cellular": 2.0, "mobile network": 2.5, "telecommunication": 2.0, "telecommunications": 2.0,
+    "operator": 1.0, "beamforming": 2.0, "mimo": 2.0, "massive mimo": 2.5, "mmwave": 2.0,
+    "millimeter wave": 2.0, "ofdm": 2.0, "uplink": 1.5, "downlink": 1.5, "spectrum": 1.5,
+    "channel estimation": 1.5, "scheduling": 1.0, "qos": 2.0, "qoe": 2.0, "kpi": 2.0,
+    "nfv": 2.0, "network function virtualization": 2.0, "sdn": 1.5, "software-defined networking": 1.5,
+    "edge computing": 1.0, "non-terrestrial network": 2.0, "ntn": 2.0, "satellite": 1.0,
+    "reconfigurable intelligent surface": 1.5, "wireless": 1.0, "throughput": 0.5, "latency": 0.5,
+}
+
+# Categories where telecom papers usually live.
+CATEGORY_PRIOR = {
+    "cs.NI": 1.0, "eess.SP": 0.7, "cs.IT": 0.5, "math.IT": 0.5, "eess.SY": 0.3, "cs.PF": 0.3,
+}
+
+KEYWORD_WEIGHT = 0.7
+CATEGORY_WEIGHT = 0.3
+KEYWORD_SATURATION = 6.0
+
+# Rough per-paper cost of everything after the pre-screen: a typical paper yields about
+# 30 chunks and each chunk takes two LLM calls.
+ESTIMATED_PDF_MB = 1.5
+ESTIMATED_PARSE_S = 30
+ESTIMATED_LLM_CALLS = 60
+
+_PATTERNS = {term: re.compile(r"(?<![\w-])" + re.escape(term) + r"(?![\w-])") for term in KEYWORDS}
+
+def keyword_score(text):
+    text = text.lower()
+    total = 0.0
+    for term, pattern in _PATTERNS.items():
+        tf = len(pattern.findall(text))
+        if tf:
+            total += KEYWORDS[term] * (1 + math.log(tf))
+    return total / (total + KEYWORD_SATURATION)
+
+def category_score(categories):
+    return max((CATEGORY_PRIOR.get(category, 0.0) for category in categories), default=0.0)
+
+def relevance_score(title, abstract, categories):
+    # Title terms are counted twice: they are a stronger signal than the abstract.
+    text = f"{title}\n{title}\n{abstract}"
+    score = KEYWORD_WEIGHT * keyword_score(text) + CATEGORY_WEIGHT * category_score(categories)
+    return round(score, 4)
+
+
+class ScreeningStats:
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+
+    def add(self, accepted):
+        if accepted:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+
+    def summary(self, avg_pdf_mb=None):
+        pdf_mb = avg_pdf_mb or ESTIMATED_PDF_MB
+        screened = self.accepted + self.rejected
+        return (
+            f"Pre-screen kept {self.accepted} of {screened} papers; skipping {self.rejected} saved "
+            f"~{self.rejected * pdf_mb:.0f} MB of downloads, ~{self.rejected * ESTIMATED_PARSE_S / 60:.0f} min "
+            f"of parsing and ~{self.rejected * ESTIMATED_LLM_CALLS} LLM calls"
+        )
@@ -0,0 +1,124 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, quote
+from scrapy.exceptions import NotConfigured
+import argparse
+import mimetypes
+import os
+import sys
+import threading
+import urllib.request
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from utils.logger import *
+
+# Set to e.g. http://127.0.0.1:8765 to send every crawler request to a local replay server.
+REPLAY_URL = os.environ.get("CRAWL_REPLAY_URL", "")
+
+def fixture_path(root, url):
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if path.endswith("/"):
+        path += "index.html"
+    if parts.query:
+        path += quote("?" + parts.query, safe="")
+    return os.path.join(root, parts.netloc, *[p for p in path.split("/") if p])
+
+def to_replay_url(url, replay_url=None):
+    replay_url = replay_url or REPLAY_URL
+    if not replay_url:
+        return url
+    parts = urlsplit(url)
+    replayed = f"{replay_url.rstrip('/')}/{parts.netloc}{parts.path or '/'}"
+    return f"{replayed}?{parts.query}" if parts.query else replayed
+
+
+class ReplayMiddleware:
+    def __init__(self, replay_url):
+        self.replay_url = replay_url
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        replay_url = crawler.settings.get("CRAWL_REPLAY_URL") or REPLAY_URL
+        if not replay_url:
+            raise NotConfigured
+        log_info(f"Replaying crawl from {replay_url}")
+        return cls(replay_url)
+
+    def process_request(self, request, spider):
+        if "replay_original_url" in request.meta:
+            return None
+        return request.replace(
+            url=to_replay_url(request.url, self.replay_url),
+            meta={**request.meta, "replay_original_url": request.url, "allow_offsite": True},
+            dont_filter=True,
+        )
+
+    def process_response(self, request, response, spider):
+        original_url = request.meta.get("replay_original_url")
+        if original_url:
+            return response.replace(url=original_url)
+        return response
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    fixtures_dir = "fixtures"
+    record = False
+
+    def do_GET(self):
+        host, _, rest = self.path.lstrip("/").partition("/")
+        original_url = f"https://{host}/{rest}"
+        path = fixture_path(self.fixtures_dir, original_url)
+
+        if not os.path.isfile(path) and self.record:
+            self._record(original_url, path)
+        if not os.path.isfile(path):
+            self.send_error(404, f"No fixture for {original_url}")
+            return
+
+        content_type = mimetypes.guess_type(path.split("%3F")[0])[0] or "text/html"
+        with open(path, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _record(self, url, path):
+        try:
+            request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+            with urllib.request.urlopen(request, timeout=120) as upstream:
+                body = upstream.read()
+        except Exception as e:
+            log_warning(f"Failed to record {url}: {e}")
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(body)
+        log_info(f"Recorded {url} → {path}")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_replay_server(fixtures_dir, port=0, record=False):
+    handler = type("Handler", (ReplayHandler,), {"fixtures_dir": fixtures_dir, "record": record})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded crawl fixtures.")
+    parser.add_argument("fixtures_dir")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--record", action="store_true", help="fetch and save fixtures that are missing")
+    args = parser.parse_args()
+
+    server, url = start_replay_server(args.fixtures_dir, args.port, args.record)
+    log_info(f"Replay server on {url} (export CRAWL_REPLAY_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
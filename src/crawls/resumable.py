@@ -0,0 +1,219 @@
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+import hashlib
+import json
+import os
+import re
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from utils.logger import *
+
+CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+def _header(headers, name):
+    value = headers.get(name)
+    return value.decode("latin-1") if value else None
+
+
+# For downloads marked with meta["resumable"], what was received before a transfer was cut
+# short is kept as <parts_dir>/<sha1(url)>.part: a truncated ("dataloss") body is written
+# once it arrives, and transfers of at least RESUMABLE_STREAM_MIN_SIZE bytes are also
+# streamed to disk as bytes arrive, so a timeout keeps them too. Smaller ones are cheap to
+# fetch again and complete downloads are never written here, only by the files store. The
+# next attempt asks for the rest with Range/If-Range and the full body is assembled from
+# disk and checked against the advertised size before it reaches the files pipeline.
+class ResumableDownloadMiddleware:
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool("RESUMABLE_DOWNLOADS_ENABLED", True):
+            raise NotConfigured
+        self.parts_dir = settings.get("RESUMABLE_PARTS_DIR") or os.path.join(settings.get("FILES_STORE") or ".", ".parts")
+        self.max_attempts = settings.getint("RESUMABLE_MAX_ATTEMPTS", 10)
+        self.stream_min_size = settings.getint("RESUMABLE_STREAM_MIN_SIZE", 32 * 1024 * 1024)
+        self.stats = crawler.stats
+        self.streams = {}
+        self.appending = {}
+        self.fresh = {}
+        os.makedirs(self.parts_dir, exist_ok=True)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(crawler)
+        crawler.signals.connect(middleware.headers_received, signal=signals.headers_received)
+        crawler.signals.connect(middleware.bytes_received, signal=signals.bytes_received)
+        return middleware
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.parts_dir, key)
+        return base + ".part", base + ".json", base + ".incoming"
+
+    def _load_sidecar(self, sidecar_path):
+        try:
+            with open(sidecar_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _discard(self, url):
+        for path in self._paths(url):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _close_stream(self, part_path):
+        stream = self.streams.pop(part_path, None)
+        if stream:
+            stream.close()
+        return self.appending.pop(part_path, False)
+
+    def _commit_incoming(self, url, part_path):
+        # Keeps the bytes of a fresh (non-ranged) transfer as the new part, but only
+        # when the server gave a validator that a later If-Range can be checked against.
+        _, sidecar_path, incoming_path = self._paths(url)
+        sidecar = self.fresh.pop(part_path, None)
+        if not os.path.exists(incoming_path):
+            return
+        if not sidecar or not (sidecar["etag"] or sidecar["last_modified"]) or not os.path.getsize(incoming_path):
+            os.remove(incoming_path)
+            return
+        os.replace(incoming_path, part_path)
+        with open(sidecar_path, "w", encoding="utf-8") as f:
+            json.dump(sidecar, f)
+
+    def process_request(self, request, spider):
+        if not request.meta.get("resumable"):
+            return None
+
+        url = request.meta.get("replay_original_url", request.url)
+        part_path, sidecar_path, _ = self._paths(url)
+        request.meta["resume_part"] = part_path
+        request.meta["resume_offset"] = 0
+
+        sidecar = self._load_sidecar(sidecar_path)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = sidecar and (sidecar.get("etag") or sidecar.get("last_modified"))
+        if not offset or not validator:
+            self._discard(url)
+            return None
+
+        # If-Range makes the server send the whole file instead if it changed meanwhile.
+        request.headers["Range"] = f"bytes={offset}-"
+        request.headers["If-Range"] = validator
+        for name in ("If-None-Match", "If-Modified-Since"):
+            request.headers.pop(name, None)
+        request.meta["resume_offset"] = offset
+        log_info(f"Resuming {url} from byte {offset}")
+        return None
+
+    def headers_received(self, headers, body_length, request, spider):
+        part_path = request.meta.get("resume_part")
+        if not part_path:
+            return
+
+        url = request.meta.get("replay_original_url", request.url)
+        _, _, incoming_path = self._paths(url)
+        offset = request.meta.get("resume_offset", 0)
+        m = CONTENT_RANGE_RE.match(_header(headers, "Content-Range") or "")
+
+        if offset and m and int(m.group(1)) == offset:
+            self.appending[part_path] = True
+            self.streams[part_path] = open(part_path, "ab")
+            return
+
+        # Headers arrive before the status is known, so the sidecar is only written once
+        # the body turns out to be worth keeping.
+        total = body_length if body_length and body_length > 0 else None
+        self.fresh[part_path] = {
+            "url": url,
+            "etag": _header(headers, "ETag"),
+            "last_modified": _header(headers, "Last-Modified"),
+            "total": total,
+        }
+        if total and total >= self.stream_min_size:
+            self.streams[part_path] = open(incoming_path, "wb")
+
+    def bytes_received(self, data, request, spider):
+        stream = self.streams.get(request.meta.get("resume_part"))
+        if stream:
+            stream.write(data)
+
+    def _retry(self, request, reason):
+        attempts = request.meta.get("resume_attempts", 0) + 1
+        if attempts > self.max_attempts:
+            log_warning(f"Giving up resuming {request.url} after {attempts - 1} attempts ({reason})")
+            return None
+        self.stats.inc_value("resumable/retries")
+        retry = request.replace(url=request.meta.get("replay_original_url", request.url), dont_filter=True)
+        retry.meta["resume_attempts"] = attempts
+        retry.meta.pop("replay_original_url", None)
+        retry.headers.pop("Range", None)
+        retry.headers.pop("If-Range", None)
+        return retry
+
+    def process_response(self, request, response, spider):
+        part_path = request.meta.get("resume_part")
+        if not part_path:
+            return response
+        appended = self._close_stream(part_path)
+
+        url = request.meta.get("replay_original_url", request.url)
+        _, sidecar_path, incoming_path = self._paths(url)
+        truncated = "dataloss" in response.flags
+
+        if response.status == 416 or (response.status == 206 and not appended):
+            self.fresh.pop(part_path, None)
+            self._discard(url)
+            return self._retry(request, f"unexpected {response.status} response") or response
+
+        if response.status not in (200, 206):
+            self.fresh.pop(part_path, None)
+            if os.path.exists(incoming_path):
+                os.remove(incoming_path)
+            return response
+
+        if not appended:
+            if not truncated:
+                self.fresh.pop(part_path, None)
+                self._discard(url)
+                return response
+            if not os.path.exists(incoming_path):
+                with open(incoming_path, "wb") as f:
+                    f.write(response.body)
+            self._commit_incoming(url, part_path)
+            self.stats.inc_value("resumable/truncated")
+            return self._retry(request, "truncated transfer") or response
+
+        if truncated:
+            self.stats.inc_value("resumable/truncated")
+            return self._retry(request, "truncated transfer") or response
+
+        offset = request.meta["resume_offset"]
+        with open(part_path, "rb") as f:
+            body = f.read()
+        total = (self._load_sidecar(sidecar_path) or {}).get("total")
+        self._discard(url)
+
+        if total is not None and len(body) != total:
+            log_warning(f"Size mismatch for {url}: got {len(body)} bytes, expected {total}")
+            self.stats.inc_value("resumable/size_mismatch")
+            return self._retry(request, "size mismatch") or response
+
+        self.stats.inc_value("resumable/resumed")
+        self.stats.inc_value("resumable/bytes_saved", offset)
+        log_info(f"Completed {url} after resuming at byte {offset} ({len(body)} bytes)")
+        headers = response.headers.copy()
+        headers.pop("Content-Range", None)
+        return response.replace(status=200, body=body, headers=headers, flags=response.flags + ["resumed"])
+
+    def process_exception(self, request, exception, spider):
+        part_path = request.meta.get("resume_part")
+        if not part_path:
+            return None
+        if not self._close_stream(part_path):
+            url = request.meta.get("replay_original_url", request.url)
+            self._commit_incoming(url, part_path)
+        if os.path.exists(part_path):
+            log_info(f"Kept {os.path.getsize(part_path)} bytes of {request.url} after {exception.__class__.__name__}")
+        return None
@@ -0,0 +1,62 @@
+from collections import namedtuple
+import re
+
+# 3GPP archive names look like 38331-i30.zip or 38101-1-i30.zip: a spec number
+# (series + 3 digits, optional part) and a version, either three base-36 digits
+# (i30 = 18.3.0) or six decimal digits once a field goes past 35 (e.g. 360000).
+SPEC_FILE_RE = re.compile(r"^(\d{2})(\d{3})((?:-\d+)*)-([0-9a-z]{3}|\d{6})\.zip$", re.IGNORECASE)
+
+SpecFile = namedtuple("SpecFile", ["spec", "base_spec", "version", "release", "file_name"])
+
+def parse_version(code):
+    code = code.lower()
+    if len(code) == 6:
+        return tuple(int(code[i:i + 2]) for i in (0, 2, 4))
+    return tuple(int(c, 36) for c in code)
+
+def version_label(version):
+    return ".".join(str(v) for v in version)
+
+def release_of(version):
+    # Major version 3 is Release 99; from Release 4 on the major version is the release.
+    major = version[0]
+    return "Rel-99" if major == 3 else f"Rel-{major}"
+
+def parse_spec_file_name(file_name):
+    m = SPEC_FILE_RE.match(file_name.strip())
+    if not m:
+        return None
+    series, number, part, code = m.groups()
+    base_spec = f"{series}.{number}"
+    version = parse_version(code)
+    return SpecFile(
+        spec=base_spec + part,
+        base_spec=base_spec,
+        version=version,
+        release=release_of(version),
+        file_name=file_name,
+    )
+
+
+class SpecCatalog:
+    def __init__(self, targets):
+        self.targets = frozenset(targets)
+
+    def match(self, file_name):
+        spec_file = parse_spec_file_name(file_name)
+        if spec_file is None:
+            return None
+        if spec_file.spec in self.targets or spec_file.base_spec in self.targets:
+            return spec_file
+        return None
+
+    def newest(self, file_names):
+        selected = {}
+        for file_name in file_names:
+            spec_file = self.match(file_name)
+            if spec_file is None:
+                continue
+            current = selected.get(spec_file.spec)
+            if current is None or spec_file.version > current.version:
+                selected[spec_file.spec] = spec_file
+        return selected
@@ -0,0 +1,187 @@
+from collections import deque
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import defer
+from twisted.internet.error import (
+    ConnectError, ConnectionDone, ConnectionLost, ConnectionRefusedError,
+    DNSLookupError, TCPTimedOutError, TimeoutError,
+)
+from twisted.web.client import ResponseFailed
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from utils.logger import *
+
+BACKOFF_STATUSES = {429, 500, 502, 503, 504, 408}
+# Only failures that say the host is struggling; IgnoreRequest from robots.txt or the
+# manifest's up-to-date check must not slow a host down.
+BACKOFF_EXCEPTIONS = (
+    defer.TimeoutError, TimeoutError, TCPTimedOutError, DNSLookupError, ConnectError,
+    ConnectionRefusedError, ConnectionDone, ConnectionLost, ResponseFailed,
+)
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return round(ordered[index], 3)
+
+
+class HostState:
+    def __init__(self, concurrency, delay):
+        self.concurrency = concurrency
+        self.delay = delay
+        self.latencies = deque(maxlen=500)
+        self.responses = 0
+        self.errors = 0
+        self.bytes = 0
+        self.successes_since_change = 0
+
+
+# Per-host AIMD throttle: concurrency grows by one after a full window of fast, healthy
+# responses and halves (with a longer delay) on errors, 429/5xx or slow responses.
+class AdaptiveThrottleMiddleware:
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool("ADAPTIVE_THROTTLE_ENABLED", True):
+            raise NotConfigured
+        self.crawler = crawler
+        self.start_concurrency = settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN")
+        self.start_delay = settings.getfloat("DOWNLOAD_DELAY")
+        self.min_concurrency = settings.getint("ADAPTIVE_THROTTLE_MIN_CONCURRENCY", 1)
+        self.max_concurrency = settings.getint("ADAPTIVE_THROTTLE_MAX_CONCURRENCY", 8)
+        self.max_delay = settings.getfloat("ADAPTIVE_THROTTLE_MAX_DELAY", 30.0)
+        self.target_latency = settings.getfloat("ADAPTIVE_THROTTLE_TARGET_LATENCY", 2.0)
+        self.metrics_file = settings.get("CRAWL_METRICS_FILE")
+        self.metrics_interval = settings.getfloat("CRAWL_METRICS_INTERVAL", 30.0)
+        self.hosts = {}
+        self.task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(crawler)
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        from twisted.internet.task import LoopingCall
+
+        self.metrics_file = self.metrics_file or os.path.join("logs", "crawl_metrics", f"{spider.name}.json")
+        self.started_at = time.monotonic()
+        self.task = LoopingCall(self.write_metrics)
+        self.task.start(self.metrics_interval, now=False)
+
+    def spider_closed(self, spider):
+        if self.task and self.task.running:
+            self.task.stop()
+        metrics = self.write_metrics()
+        log_info(f"Crawl metrics for {spider.name}: {json.dumps(metrics['totals'])}")
+
+    def _state(self, request):
+        key = request.meta.get("download_slot")
+        if key not in self.hosts:
+            self.hosts[key] = HostState(self.start_concurrency, self.start_delay)
+        return key, self.hosts[key]
+
+    def _apply(self, key, state):
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is not None:
+            slot.concurrency = state.concurrency
+            slot.delay = state.delay
+
+    def _back_off(self, key, state, retry_after=None):
+        state.concurrency = max(self.min_concurrency, state.concurrency // 2)
+        state.delay = min(self.max_delay, max(state.delay * 2, 0.5, retry_after or 0))
+        state.successes_since_change = 0
+        self._apply(key, state)
+
+    def process_response(self, request, response, spider):
+        if request.meta.get("download_slot") is None:
+            return response
+        key, state = self._state(request)
+        latency = request.meta.get("download_latency")
+        state.responses += 1
+        state.bytes += len(response.body)
+        if latency is not None:
+            state.latencies.append(latency)
+
+        if response.status in BACKOFF_STATUSES:
+            state.errors += 1
+            retry_after = response.headers.get("Retry-After")
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            self._back_off(key, state, retry_after)
+            return response
+
+        if latency is not None and latency > 2 * self.target_latency:
+            if state.concurrency > self.min_concurrency:
+                state.concurrency -= 1
+                state.successes_since_change = 0
+                self._apply(key, state)
+            return response
+
+        state.successes_since_change += 1
+        if state.successes_since_change >= state.concurrency:
+            state.successes_since_change = 0
+            state.delay = state.delay * 0.75 if state.delay > 0.05 else 0.0
+            if (latency is None or latency < self.target_latency) and state.concurrency < self.max_concurrency:
+                state.concurrency += 1
+            self._apply(key, state)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        if request.meta.get("download_slot") is None or not isinstance(exception, BACKOFF_EXCEPTIONS):
+            return None
+        key, state = self._state(request)
+        state.errors += 1
+        self._back_off(key, state)
+
+    def metrics(self):
+        slots = self.crawler.engine.downloader.slots if self.crawler.engine else {}
+        stats = self.crawler.stats
+        all_latencies = [latency for state in self.hosts.values() for latency in state.latencies]
+        elapsed = time.monotonic() - self.started_at
+        hosts = {}
+        for key, state in self.hosts.items():
+            slot = slots.get(key)
+            hosts[key] = {
+                "in_flight": len(slot.transferring) if slot else 0,
+                "queued": len(slot.queue) if slot else 0,
+                "concurrency": state.concurrency,
+                "delay": round(state.delay, 3),
+                "responses": state.responses,
+                "errors": state.errors,
+                "bytes": state.bytes,
+                "p50_latency": percentile(state.latencies, 0.5),
+                "p95_latency": percentile(state.latencies, 0.95),
+            }
+        return {
+            "totals": {
+                "elapsed_s": round(elapsed, 1),
+                "in_flight": sum(h["in_flight"] for h in hosts.values()),
+                "responses": stats.get_value("downloader/response_count", 0),
+                "retries": stats.get_value("retry/count", 0),
+                "bytes": stats.get_value("downloader/response_bytes", 0),
+                "p50_latency": percentile(all_latencies, 0.5),
+                "p95_latency": percentile(all_latencies, 0.95),
+            },
+            "hosts": hosts,
+        }
+
+    def write_metrics(self):
+        metrics = self.metrics()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.metrics_file)), exist_ok=True)
+            with open(self.metrics_file, "w", encoding="utf-8") as f:
+                json.dump(metrics, f, indent=4)
+        except OSError as e:
+            log_warning(f"Could not write crawl metrics to {self.metrics_file}: {e}")
+        return metrics
@@ -1,43 +1,99 @@
-from scrapy import Spider
-from scrapy.pipelines.files import FilesPipeline
+from scrapy import Request
+from twisted.internet.defer import DeferredList
 from typing import override
 import os
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
 
-from utils.file_helpers import convert_doc_to_pdf
+from utils.doc_converter import DocConverterPool
 from utils.logger import *
-from config import RAW_DATA_PATH
+from config import RAW_DATA_PATH, CRAWL_JOBS_DIR
+from manifest import ManifestFilesPipeline
+from job_state import ResumableSpider
+from post_download import PostDownloadStage
 
 OUTPUT_DIR = os.path.join(RAW_DATA_PATH, "vn_spec")
 
-class VnSpecFilesPipeline(FilesPipeline):
+CONVERT_WORKERS = 2
+
+# With CONVERT_TO_PDF off, .docx files are kept for the native DOCX parser and only
+# legacy .doc files go through LibreOffice (to .docx).
+CONVERT_TO_PDF = True
+CONVERT_FORMAT = "pdf" if CONVERT_TO_PDF else "docx"
+CONVERT_EXTENSIONS = (".doc", ".docx") if CONVERT_TO_PDF else (".doc",)
+
+class VnSpecFilesPipeline(ManifestFilesPipeline):
+    @override
+    def open_spider(self, spider):
+        super().open_spider(spider)
+        self.converter = DocConverterPool(workers=CONVERT_WORKERS, target_format=CONVERT_FORMAT)
+        self.stage = PostDownloadStage(spider.crawler.stats, workers=1)
+        self.resumed = self._resume_tasks()
+
     def file_path(self, request, response=None, info=None, *, item=None):
         return os.path.basename(request.url)
 
+    @override
+    def has_outputs(self, request, item):
+        full_path = os.path.join(self.store.basedir, self.file_path(request, item=item))
+        if full_path.endswith(CONVERT_EXTENSIONS):
+            return os.path.exists(os.path.splitext(full_path)[0] + f".{CONVERT_FORMAT}")
+        return os.path.exists(full_path)
+
     @override
     def item_completed(self, results, item, info):
+        jobs = []
         for success, file_info in results:
             if not success:
                 continue
+            # A download left by an interrupted run is "uptodate" but may not be converted yet.
+            if file_info["status"] == "uptodate" and self.has_outputs(Request(file_info["url"]), item):
+                continue
 
-            file_path = file_info["path"]
-            full_path = os.path.join(info.spider.settings.get("FILES_STORE"), file_path)
+            full_path = os.path.join(info.spider.settings.get("FILES_STORE"), file_info["path"])
+            if full_path.endswith(CONVERT_EXTENSIONS):
+                jobs.append(self._convert(full_path))
+
+        return DeferredList(jobs).addCallback(lambda _: item)
+
+    def _resume_tasks(self):
+        jobs = []
+        for doc_path, _ in self.pending_tasks("convert"):
+            if os.path.exists(doc_path):
+                jobs.append(self._convert(doc_path))
+            else:
+                self.finish_task(doc_path)
+        if jobs:
+            log_info(f"Resuming {len(jobs)} conversions from the previous run")
+        return DeferredList(jobs)
+
+    def _convert(self, full_path):
+        self.start_task(full_path, "convert", full_path)
+        try:
+            d = self.stage.track("convert", self.converter.submit(full_path, remove_source=True))
+        except Exception as e:
+            log_error(f"Failed to convert {full_path} to {CONVERT_FORMAT}: {e}")
+            self.finish_task(full_path)
+            return DeferredList([])
+        d.addCallbacks(
+            lambda out_path, src=full_path: log_info(f"Converted {src} → {out_path}"),
+            lambda failure, src=full_path: log_error(f"Failed to convert {src} to {CONVERT_FORMAT}: {failure.value}"),
+        )
+        d.addCallback(lambda _, src=full_path: self.finish_task(src))
+        return d
 
-            if full_path.endswith((".doc", ".docx")):
-                pdf_path = os.path.splitext(full_path)[0] + ".pdf"
-                try:
-                    convert_doc_to_pdf(full_path, pdf_path)
-                    os.remove(full_path)
-                    log_info(f"Converted {full_path} → {pdf_path}")
-                except Exception as e:
-                    log_error(f"Failed to convert {full_path} to PDF: {e}")
+    @override
+    def close_spider(self, spider):
+        return self.resumed.addBoth(lambda _: self._shutdown(spider))
 
-        return item
+    def _shutdown(self, spider):
+        self.stage.close()
+        self.converter.shutdown()
+        super().close_spider(spider)
 
 
-class VnSpecSpider(Spider):
+class VnSpecSpider(ResumableSpider):
     name = "mst"
     allowed_domains = ["mst.gov.vn", "mic.mediacdn.vn"]
     start_urls = [
@@ -46,7 +102,9 @@ class VnSpecSpider(Spider):
 
     custom_settings = {
         "DOWNLOAD_DELAY": 1,
-        "CONCURRENT_REQUESTS": 2,
+        "CONCURRENT_REQUESTS": 16,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 2,
+        "ADAPTIVE_THROTTLE_MAX_CONCURRENCY": 8,
         "USER_AGENT": (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
             "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -59,15 +117,25 @@ class VnSpecSpider(Spider):
         "ITEM_PIPELINES": {
             "__main__.VnSpecFilesPipeline": 1,
         },
+        "DOWNLOADER_MIDDLEWARES": {
+            "replay.ReplayMiddleware": 950,
+            "throttle.AdaptiveThrottleMiddleware": 900,
+            "resumable.ResumableDownloadMiddleware": 800,
+        },
         "DOWNLOAD_FAIL_ON_DATALOSS": False,
         "RETRY_TIMES": 5,
-        "RETRY_HTTP_CODES": [500, 502, 503, 504, 408],
+        "RETRY_HTTP_CODES": [429, 500, 502, 503, 504, 408],
         "DOWNLOAD_TIMEOUT": 120,
         "FEED_EXPORT_ENCODING": "utf-8",
+        "JOBDIR": os.path.join(CRAWL_JOBS_DIR, name),
+        "EXTENSIONS": {
+            "job_state.JobStateExtension": 0,
+        },
     }
 
     @override
     def parse(self, response):
+        items = []
         for a in response.css("p.MsoNormal a"):
             file_url = a.attrib.get("href")
             title = a.css("span::text").get(default="").strip()
@@ -75,10 +143,12 @@ class VnSpecSpider(Spider):
             if file_url and file_url.endswith((".doc", ".docx", ".pdf")):
                 absolute_url = response.urljoin(file_url)
                 log_info(f"Found file: {absolute_url}")
-                yield {
+                items.append({
                     "title": title,
                     "file_urls": [absolute_url],
-                }
+                })
+
+        yield from self.new_items(items)
 
 
 if __name__ == "__main__":
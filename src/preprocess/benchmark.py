@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import fitz
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.append(PROJECT_ROOT)
+
+from src.preprocess.parser import build_pdf_document, get_all_source_files, extract_tables, extract_tables_pymupdf
+from src.preprocess.table_candidates import candidate_pages
+from src.preprocess.docx_parser import build_docx_document
+from src.utils.doc_converter import DocConverterPool
+from src.utils.file_helpers import convert_doc_to_pdf
+from src.utils.logger import *
+
+def _summary(content: dict) -> dict:
+    return {
+        "pages": content.get("total_pages", 0),
+        "blocks": sum(len(p["blocks"]) for p in content.get("pages", [])),
+        "tables": len(content.get("tables", [])),
+    }
+
+
+def benchmark_docx(sample_dir: str) -> list:
+    docx_files = get_all_source_files(sample_dir, (".docx",))
+    work_dir = tempfile.mkdtemp(prefix="docx_bench_")
+    converter = DocConverterPool(workers=1)
+    results = []
+
+    for docx_path in docx_files:
+        started = time.perf_counter()
+        native = build_docx_document(docx_path)
+        native_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        pdf_path = converter.submit(docx_path, os.path.join(work_dir, os.path.basename(docx_path) + ".pdf")).result()
+        convert_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        round_trip = build_pdf_document(pdf_path)
+        pdf_parse_s = time.perf_counter() - started
+
+        results.append({
+            "file": os.path.relpath(docx_path, sample_dir),
+            "native_s": round(native_s, 3),
+            "convert_s": round(convert_s, 3),
+            "pdf_parse_s": round(pdf_parse_s, 3),
+            "speedup": round((convert_s + pdf_parse_s) / native_s, 1) if native_s else None,
+            "native": _summary(native),
+            "pdf_round_trip": _summary(round_trip),
+        })
+        log_info(json.dumps(results[-1]))
+
+    converter.shutdown()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    if results:
+        native_total = sum(r["native_s"] for r in results)
+        round_trip_total = sum(r["convert_s"] + r["pdf_parse_s"] for r in results)
+        log_info(
+            f"DOCX: {len(results)} files, native {native_total:.1f}s vs convert+PDF parse "
+            f"{round_trip_total:.1f}s ({round_trip_total / max(native_total, 1e-9):.1f}x)"
+        )
+    return results
+
+
+def benchmark_convert(sample_dir: str, workers: int = None) -> dict:
+    # The same .doc/.docx files through the old path (one libreoffice --convert-to per
+    # file, one at a time) and through the pool of warm LibreOffice instances.
+    doc_files = sorted(get_all_source_files(sample_dir, (".doc", ".docx")))
+    work_dir = tempfile.mkdtemp(prefix="convert_bench_")
+    results = {"files": len(doc_files)}
+
+    started = time.perf_counter()
+    converted = 0
+    for index, doc_path in enumerate(doc_files):
+        out_dir = os.path.join(work_dir, "per_file", str(index))
+        os.makedirs(out_dir)
+        try:
+            convert_doc_to_pdf(doc_path, os.path.join(out_dir, os.path.basename(doc_path) + ".pdf"))
+            converted += 1
+        except Exception as e:
+            log_warning(f"Per-file conversion failed for {doc_path}: {e}")
+    elapsed = time.perf_counter() - started
+    results["per_file"] = {"converted": converted, "seconds": round(elapsed, 1), "per_min": round(converted / elapsed * 60, 1) if elapsed else None}
+
+    converter = DocConverterPool(workers=workers)
+    started = time.perf_counter()
+    futures = [
+        converter.submit(doc_path, os.path.join(work_dir, "pool", str(index), os.path.basename(doc_path) + ".pdf"))
+        for index, doc_path in enumerate(doc_files)
+    ]
+    converter.join()
+    elapsed = time.perf_counter() - started
+    converted = sum(1 for future in futures if future.exception() is None)
+    converter.shutdown()
+    results["pool"] = {
+        "workers": converter.workers,
+        "converted": converted,
+        "seconds": round(elapsed, 1),
+        "per_min": round(converted / elapsed * 60, 1) if elapsed else None,
+    }
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    log_info(
+        f"Conversion: per-file {results['per_file']['per_min']}/min vs pool of {converter.workers} "
+        f"{results['pool']['per_min']}/min on {len(doc_files)} files"
+    )
+    return results
+
+
+def _bbox_overlap(a, b) -> float:
+    x0, top, x1, bottom = max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x1 - x0) * max(0, bottom - top)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+
+def _found(reference: list, tables: list) -> int:
+    # A reference table counts as found when a table on the same page overlaps it
+    # by at least half (IoU), since the engines disagree on exact bboxes.
+    return sum(
+        any(t["page_no"] == ref["page_no"] and _bbox_overlap(t["bbox"], ref["bbox"]) >= 0.5 for t in tables)
+        for ref in reference
+    )
+
+
+def _source(pdf_path: str, sample_dir: str) -> str:
+    parts = os.path.relpath(pdf_path, sample_dir).split(os.sep)
+    return parts[0] if len(parts) > 1 else "."
+
+
+def _sample_pdfs(sample_dir: str, sample: int, seed: int) -> list:
+    # The same number of PDFs from every top-level source folder (3gpp_spec, itu_spec,
+    # vn_spec, ...) as far as each has them, so no single source dominates the recall.
+    by_source = {}
+    for pdf_path in sorted(get_all_source_files(sample_dir)):
+        by_source.setdefault(_source(pdf_path, sample_dir), []).append(pdf_path)
+    rng = random.Random(seed)
+    for paths in by_source.values():
+        rng.shuffle(paths)
+    picked = []
+    while len(picked) < sample and any(by_source.values()):
+        for paths in by_source.values():
+            if paths and len(picked) < sample:
+                picked.append(paths.pop())
+    return sorted(picked)
+
+
+def benchmark_tables(sample_dir: str, sample: int = None, max_pages: int = None, seed: int = 0) -> list:
+    # Reference is pdfplumber on every page, i.e. the parser before pre-filtering. Point
+    # sample_dir at data/raw with sample/max_pages to measure recall on real documents.
+    pdf_files = _sample_pdfs(sample_dir, sample, seed) if sample else get_all_source_files(sample_dir)
+    results = []
+    for pdf_path in pdf_files:
+        with fitz.open(pdf_path) as doc:
+            pages = doc.page_count
+        page_numbers = list(range(1, min(pages, max_pages) + 1)) if max_pages else None
+
+        started = time.perf_counter()
+        reference = extract_tables(pdf_path, page_numbers)
+        full_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        candidates = candidate_pages(pdf_path, page_numbers)
+        prefilter_s = time.perf_counter() - started
+
+        variants = {}
+        for name, extractor in (("pdfplumber", extract_tables), ("pymupdf", extract_tables_pymupdf)):
+            started = time.perf_counter()
+            tables = extractor(pdf_path, candidates) if candidates else []
+            variants[name] = {
+                "seconds": round(prefilter_s + time.perf_counter() - started, 3),
+                "tables": len(tables),
+                "found": _found(reference, tables),
+            }
+        # Reference tables on pages the prefilter rejected, for tuning its thresholds.
+        missed = [{"page_no": t["page_no"], "caption": t["caption"]} for t in reference if t["page_no"] not in candidates]
+
+        results.append({
+            "file": os.path.relpath(pdf_path, sample_dir),
+            "source": _source(pdf_path, sample_dir),
+            "pages": len(page_numbers) if page_numbers else pages,
+            "candidate_pages": len(candidates),
+            "reference_tables": len(reference),
+            "full_pdfplumber_s": round(full_s, 3),
+            "prefilter_s": round(prefilter_s, 3),
+            "prefiltered": variants,
+            "missed_by_prefilter": missed,
+        })
+        log_info(json.dumps(results[-1]))
+
+    if results:
+        reference_total = sum(r["reference_tables"] for r in results)
+        full_total = sum(r["full_pdfplumber_s"] for r in results)
+        for name in ("pdfplumber", "pymupdf"):
+            seconds = sum(r["prefiltered"][name]["seconds"] for r in results)
+            found = sum(r["prefiltered"][name]["found"] for r in results)
+            log_info(
+                f"Prefilter + {name}: {seconds:.1f}s vs full pdfplumber {full_total:.1f}s "
+                f"({full_total / max(seconds, 1e-9):.1f}x), recall {found}/{reference_total}"
+            )
+        for source in sorted({r["source"] for r in results}):
+            rows = [r for r in results if r["source"] == source]
+            log_info(
+                f"  {source}: {len(rows)} PDFs, {sum(r['pages'] for r in rows)} pages, prefilter recall "
+                f"{sum(r['reference_tables'] - len(r['missed_by_prefilter']) for r in rows)}/{sum(r['reference_tables'] for r in rows)}"
+            )
+    return results
+
+
+BENCHMARKS = {
+    "convert": benchmark_convert,
+    "docx": benchmark_docx,
+    "tables": benchmark_tables,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark preprocessing paths on a sample corpus.")
+    parser.add_argument("benchmark", choices=list(BENCHMARKS))
+    parser.add_argument("sample_dir")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--sample", type=int, help="tables: benchmark this many PDFs, spread across source folders")
+    parser.add_argument("--max-pages", type=int, help="tables: only the first N pages of each PDF")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="convert: LibreOffice pool size")
+    args = parser.parse_args()
+
+    if args.benchmark == "tables":
+        results = benchmark_tables(args.sample_dir, args.sample, args.max_pages, args.seed)
+    elif args.benchmark == "convert":
+        results = benchmark_convert(args.sample_dir, args.workers)
+    else:
+        results = BENCHMARKS[args.benchmark](args.sample_dir)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
@@ -0,0 +1,54 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from src.preprocess.config import BUILD_CACHE_PATH
+
+def build_key(stage: str, input_hash: str, version: int, params: dict) -> str:
+    payload = json.dumps(
+        {"stage": stage, "input": input_hash, "version": version, "params": params},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Remembers the key every artifact was built from. An artifact is reused only while its
+# key still matches, so a changed input file, code version or parameter rebuilds exactly
+# the artifacts it affects.
+class BuildCache:
+    def __init__(self, db_path: str = BUILD_CACHE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # Parser workers write to the manifest from separate processes.
+        self.conn = sqlite3.connect(db_path, timeout=60)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS artifacts (
+                path TEXT PRIMARY KEY,
+                stage TEXT,
+                build_key TEXT,
+                input_hash TEXT,
+                built_at REAL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def is_fresh(self, path: str, key: str) -> bool:
+        row = self.conn.execute("SELECT build_key FROM artifacts WHERE path = ?", (os.path.normpath(path),)).fetchone()
+        return bool(row) and row[0] == key and os.path.exists(path)
+
+    def record(self, path: str, stage: str, key: str, input_hash: str):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO artifacts (path, stage, build_key, input_hash, built_at) VALUES (?, ?, ?, ?, ?)",
+            (os.path.normpath(path), stage, key, input_hash, time.time()),
+        )
+        self.conn.commit()
+
+    def forget(self, path: str):
+        self.conn.execute("DELETE FROM artifacts WHERE path = ?", (os.path.normpath(path),))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
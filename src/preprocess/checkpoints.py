@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+from typing import Optional
+
+from src.preprocess.config import PARSE_CHECKPOINT_DIR
+from src.utils.logger import *
+
+# Finished page ranges of one large PDF, saved as soon as each range is parsed so an
+# interrupted parse resumes with only the missing ranges. The directory is named after
+# the parse build key, so ranges from another version of the file, the parser or its
+# parameters are never mixed into a document.
+class RangeCheckpoints:
+    def __init__(self, directory: str, root: str = PARSE_CHECKPOINT_DIR):
+        self.directory = directory
+        self.root = root
+
+    def _path(self, start: int, end: int) -> str:
+        return os.path.join(self.directory, f"{start:06d}-{end:06d}.json")
+
+    def exists(self, start: int, end: int) -> bool:
+        return os.path.exists(self._path(start, end))
+
+    def count(self) -> int:
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def load(self, start: int, end: int) -> Optional[dict]:
+        path = self._path(start, end)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except ValueError:
+            # Unreadable checkpoints are dropped and the range is parsed again.
+            log_warning(f"  -> Dropping unreadable checkpoint: {path}")
+            os.remove(path)
+            return None
+
+    def save(self, start: int, end: int, content: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(start, end)
+        tmp_path = path + ".part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(content, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        # Per-document folders left empty are pruned, but never the root itself.
+        root = os.path.abspath(self.root)
+        parent = os.path.abspath(os.path.dirname(self.directory))
+        while parent != root and parent.startswith(root + os.sep):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+
+
+def document_checkpoints(rel_path: str, key: str, root: str = PARSE_CHECKPOINT_DIR) -> RangeCheckpoints:
+    doc_dir = os.path.join(root, rel_path)
+    if os.path.isdir(doc_dir):
+        for name in os.listdir(doc_dir):
+            if name != key:
+                shutil.rmtree(os.path.join(doc_dir, name), ignore_errors=True)
+    return RangeCheckpoints(os.path.join(doc_dir, key), root)
@@ -4,13 +4,20 @@ import json
 from typing import List, Tuple
 
 from src.preprocess.config import (
-    PARSED_JSON_DIR, CLEANED_JSON_DIR, 
+    RAW_DATA_DIR, PARSED_JSON_DIR, CLEANED_JSON_DIR, 
     MAX_CHUNK_WORDS, OVERLAP_WORDS, SOURCE_CONFIG,
     ensure_dir_exists
 )
 
+from src.preprocess.build_cache import BuildCache, build_key
+from src.preprocess.parsed_format import EXTENSIONS, open_parsed
+from src.utils.content_store import sha256_file
 from src.utils.logger import *
 
+# Bump whenever a cleaner change alters the chunks; cleaned files built by an older
+# version are then rebuilt.
+CLEANER_VERSION = 1
+
 def clean_text_content(text: str) -> str:
     if not text: return ""
     text = text.replace("…", ".").replace("·", ".").replace("‧", ".").replace("∙", ".").replace("⋯", ".")
@@ -52,6 +59,15 @@ def build_source_origin(file_path: str, source_config):
     return os.path.basename(file_path)
 
 
+def build_source_origins(raw_rel_paths: List[str], source_config) -> List[str]:
+    origins = []
+    for rel_path in raw_rel_paths:
+        origin = build_source_origin(os.path.join(RAW_DATA_DIR, rel_path), source_config)
+        if origin not in origins:
+            origins.append(origin)
+    return origins
+
+
 def _is_block_inside_table(block_bbox: List[float], table_bboxes: List[Tuple[float]]) -> bool:
     if not block_bbox: return False
     b_x0, b_y0, b_x1, b_y1 = block_bbox
@@ -85,6 +101,11 @@ def format_table_to_string(table_data: List[List[str]], caption: str, surroundin
     return formatted
 
 
+def clean_build_key(parsed_hash: str) -> str:
+    params = {"max_chunk_words": MAX_CHUNK_WORDS, "overlap_words": OVERLAP_WORDS, "source_config": SOURCE_CONFIG}
+    return build_key("clean", parsed_hash, CLEANER_VERSION, params)
+
+
 def clean_and_chunk_data(parsed_json_path: str) -> int:
     try:
         rel_path = os.path.relpath(parsed_json_path, PARSED_JSON_DIR)
@@ -95,23 +116,39 @@ def clean_and_chunk_data(parsed_json_path: str) -> int:
     output_path = os.path.join(CLEANED_JSON_DIR, output_rel_path)
     
     ensure_dir_exists(os.path.dirname(output_path))
-    if os.path.exists(output_path):
-        log_info(f"  -> Skipped (Exists): {output_path}")
-        return output_path
+    try:
+        parsed_hash = sha256_file(parsed_json_path)
+    except Exception as e:
+        log_error(f"Error reading parsed file {parsed_json_path}: {e}")
+        return 0
+    key = clean_build_key(parsed_hash)
+    cache = BuildCache()
+    try:
+        if cache.is_fresh(output_path, key):
+            log_info(f"  -> Skipped (Cached): {output_path}")
+            return output_path
+        if os.path.exists(output_path):
+            log_info(f"  -> Stale: {output_path}")
+    finally:
+        cache.close()
 
     try:
-        with open(parsed_json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        doc = open_parsed(parsed_json_path)
     except Exception as e:
         log_error(f"Error reading parsed file {parsed_json_path}: {e}")
         return 0
 
-    document_id = os.path.basename(parsed_json_path)
+    # Chunks are labelled as if from the .json file whichever format the parsed file is
+    # stored in, so document ids do not change with parsed_format.
+    json_path = os.path.splitext(parsed_json_path)[0] + ".json"
+    document_id = os.path.basename(json_path)
     all_chunks = []
-    origin = build_source_origin(parsed_json_path, SOURCE_CONFIG)
+    origin = build_source_origin(json_path, SOURCE_CONFIG)
+    origins = build_source_origins(doc.source_paths, SOURCE_CONFIG) or [origin]
+    tables = doc.tables
 
     table_bboxes_by_page = {}
-    for table in data.get("tables", []):
+    for table in tables:
         page_no = table.get("page_no")
         if page_no not in table_bboxes_by_page:
             table_bboxes_by_page[page_no] = []
@@ -120,7 +157,7 @@ def clean_and_chunk_data(parsed_json_path: str) -> int:
             table_bboxes_by_page[page_no].append(list(bbox))
 
     full_text = ""
-    for page in data.get("pages", []):
+    for page in doc.iter_pages():
         page_no = page.get("page_no")
         table_bboxes_on_this_page = table_bboxes_by_page.get(page_no, [])
         
@@ -132,6 +169,7 @@ def clean_and_chunk_data(parsed_json_path: str) -> int:
                 cleaned_text = clean_text_content(b["text"])
                 if cleaned_text:
                     full_text += cleaned_text + "\n\n"
+    doc.close()
 
     if full_text:
         chunks = split_text_by_words(full_text.strip(), MAX_CHUNK_WORDS, OVERLAP_WORDS)
@@ -141,13 +179,14 @@ def clean_and_chunk_data(parsed_json_path: str) -> int:
                 "source": { 
                     "document_id": document_id, 
                     "origin": origin, 
+                    "origins": origins,
                     "chunk_type": "TEXT_BLOCK", 
                     "chunk_order": i + 1, 
                     "length_words": len(chunk.split())
                 }
             })
 
-    for table in data.get("tables", []):
+    for table in tables:
         raw_table = table.get("data")
         caption = table.get("caption", "")
         surrounding_context = table.get("surrounding_context", "")
@@ -160,6 +199,7 @@ def clean_and_chunk_data(parsed_json_path: str) -> int:
                     "source": { 
                         "document_id": document_id, 
                         "origin": origin, 
+                        "origins": origins,
                         "chunk_type": "TECHNICAL_TABLE", 
                         "page_no": table.get("page_no"), 
                         "table_index": table.get("table_index"), 
@@ -172,6 +212,9 @@ def clean_and_chunk_data(parsed_json_path: str) -> int:
             ensure_dir_exists(os.path.dirname(output_path))
             with open(output_path, "w", encoding="utf-8") as f:
                 json.dump(all_chunks, f, ensure_ascii=False, indent=4)
+            cache = BuildCache()
+            cache.record(output_path, "clean", key, parsed_hash)
+            cache.close()
             log_info(f"  -> Cleaned & Saved: {output_path} ({len(all_chunks)} chunks)")
             return output_path
         except Exception as e:
@@ -179,6 +222,13 @@ def clean_and_chunk_data(parsed_json_path: str) -> int:
             return 0
     else:
         log_warning(f"  -> Warning: No content extracted for {document_id}")
+        # A cleaned file from an earlier build would otherwise be read as current.
+        if os.path.exists(output_path):
+            os.remove(output_path)
+            log_info(f"  -> Removed stale: {output_path}")
+        cache = BuildCache()
+        cache.forget(output_path)
+        cache.close()
         return 0
     
 
@@ -189,7 +239,7 @@ def clean_all_parsed_documents():
 
     for root, _, files in os.walk(PARSED_JSON_DIR):
         for file_name in files:
-            if not file_name.endswith(".json"):
+            if not file_name.endswith(tuple(EXTENSIONS.values())):
                 continue
 
             parsed_path = os.path.join(root, file_name)
@@ -9,6 +9,10 @@ with open(os.path.join(PROJECT_ROOT, "config/path.yaml"), "r", encoding="utf-8")
 RAW_DATA_DIR = data_paths["raw"]
 PARSED_JSON_DIR = data_paths["preprocessed"]["parsed"]
 CLEANED_JSON_DIR = data_paths["preprocessed"]["cleaned"]
+BUILD_CACHE_PATH = data_paths["preprocessed"].get("build_cache", "data/preprocessed/build_cache.sqlite")
+PARSE_CHECKPOINT_DIR = data_paths["preprocessed"].get("checkpoints", "data/preprocessed/checkpoints/")
+CONTENT_STORE_DIR = data_paths.get("content_store", "data/content_store/")
+PARSE_PROFILE_DIR = data_paths.get("parse_profiles", "logs/parse_profiles/")
 SOURCE_CONFIG_PATH = os.path.join(PROJECT_ROOT, "config/source-name.yaml")
 
 with open(os.path.join(PROJECT_ROOT, "config/parameters.yaml"), "r", encoding="utf-8") as f:
@@ -17,6 +21,21 @@ with open(os.path.join(PROJECT_ROOT, "config/parameters.yaml"), "r", encoding="u
 MAX_CHUNK_WORDS = parameters.get("max_chunk_words", 512)
 OVERLAP_WORDS = parameters.get("overlap_words", 64)
 
+LARGE_PDF_PAGES = parameters.get("large_pdf_pages", 300)
+PAGE_RANGE_SIZE = parameters.get("page_range_size", 100)
+PAGE_RANGE_WORKERS = parameters.get("page_range_workers", max(1, min(4, (os.cpu_count() or 1) // 2)))
+CHECKPOINT_RANGES = parameters.get("checkpoint_ranges", True)
+
+TABLE_ENGINE = parameters.get("table_engine", "pdfplumber")
+TABLE_PREFILTER = parameters.get("table_prefilter", False)
+if TABLE_ENGINE not in ("pdfplumber", "pymupdf"):
+    raise ValueError(f"Unknown table_engine: {TABLE_ENGINE}")
+
+PARSE_PROFILE = parameters.get("parse_profile", False)
+PARSED_FORMAT = parameters.get("parsed_format", "json")
+if PARSED_FORMAT not in ("json", "binary"):
+    raise ValueError(f"Unknown parsed_format: {PARSED_FORMAT}")
+
 with open(SOURCE_CONFIG_PATH, "r", encoding="utf-8") as f:
     SOURCE_CONFIG = yaml.safe_load(f)
 
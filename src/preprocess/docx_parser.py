@@ -0,0 +1,136 @@
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import List, Optional, Tuple
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+CAPTION_KEYWORDS = ("bảng", "table")
+# Wrappers whose paragraphs and tables still belong to the body flow; 3GPP templates put
+# the scope and contents sections inside content controls (w:sdt).
+BLOCK_CONTAINERS = (W + "sdt", W + "sdtContent", W + "customXml")
+
+def _is_page_break(elem) -> bool:
+    if elem.tag == W + "lastRenderedPageBreak":
+        return True
+    return elem.tag == W + "br" and elem.get(W + "type") == "page"
+
+
+def _paragraph_text(paragraph) -> Tuple[str, Optional[bool]]:
+    # Returns the paragraph text and, if it holds a page break, whether the break
+    # came before any text (new page starts here) or after it (next paragraph).
+    parts = []
+    break_before = None
+    for elem in paragraph.iter():
+        if elem.tag == W + "t" and elem.text:
+            parts.append(elem.text)
+        elif elem.tag == W + "tab":
+            parts.append("\t")
+        elif elem.tag in (W + "br", W + "cr") and not _is_page_break(elem):
+            parts.append("\n")
+        elif _is_page_break(elem) and break_before is None:
+            break_before = not "".join(parts).strip()
+    return "".join(parts).strip(), break_before
+
+
+def _cell_span(cell) -> Tuple[int, bool]:
+    props = cell.find(W + "tcPr")
+    if props is None:
+        return 1, False
+    span = props.find(W + "gridSpan")
+    merge = props.find(W + "vMerge")
+    columns = int(span.get(W + "val", "1")) if span is not None else 1
+    continued = merge is not None and merge.get(W + "val", "continue") == "continue"
+    return columns, continued
+
+
+def _table_rows(table) -> List[List[Optional[str]]]:
+    # Merged cells become None, matching what pdfplumber returns for spanned cells.
+    rows = []
+    for row in table.findall(W + "tr"):
+        cells = []
+        for cell in row.findall(W + "tc"):
+            columns, continued = _cell_span(cell)
+            text = "\n".join(
+                t for t in (_paragraph_text(p)[0] for p in cell.iter(W + "p")) if t
+            )
+            cells.append(None if continued else text)
+            cells.extend([None] * (columns - 1))
+        rows.append(cells)
+    return rows
+
+
+def _is_caption(text: str) -> bool:
+    lowered = text.lower()
+    return any(keyword in lowered for keyword in CAPTION_KEYWORDS)
+
+
+def build_docx_document(file_path: str) -> dict:
+    content = {"pages": [], "tables": []}
+    page = {"page_no": 1, "blocks": []}
+    block_id = 0
+    table_index = 0
+    previous_text = ""
+    pending_tables = []
+
+    def new_page():
+        nonlocal page, block_id, table_index
+        content["pages"].append(page)
+        page = {"page_no": page["page_no"] + 1, "blocks": []}
+        block_id = 0
+        table_index = 0
+
+    def resolve_pending(next_text):
+        for table, text_above in pending_tables:
+            caption = None
+            if _is_caption(text_above):
+                caption = text_above
+            elif _is_caption(next_text):
+                caption = next_text
+            if caption:
+                table["caption"] = " ".join(caption.split())
+                table["surrounding_context"] = "\n".join(t for t in (text_above, next_text) if t).strip()
+                content["tables"].append(table)
+        pending_tables.clear()
+
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open("word/document.xml") as stream:
+            ancestors = []
+            for event, elem in ET.iterparse(stream, events=("start", "end")):
+                if event == "start":
+                    ancestors.append(elem.tag)
+                    continue
+                ancestors.pop()
+                # Only body-level elements (document > body > child, possibly inside
+                # content controls) are handled; their subtree is complete at this point
+                # and can be dropped afterwards.
+                if len(ancestors) < 2 or any(tag not in BLOCK_CONTAINERS for tag in ancestors[2:]):
+                    continue
+
+                if elem.tag == W + "p":
+                    text, break_before = _paragraph_text(elem)
+                    if break_before is True and page["blocks"]:
+                        new_page()
+                    if text:
+                        resolve_pending(text)
+                        page["blocks"].append({"text": text, "bbox": [], "block_id": block_id})
+                        block_id += 1
+                        previous_text = text
+                    if break_before is False:
+                        new_page()
+                elif elem.tag == W + "tbl":
+                    rows = _table_rows(elem)
+                    if rows:
+                        pending_tables.append(({
+                            "page_no": page["page_no"],
+                            "table_index": table_index,
+                            "caption": None,
+                            "surrounding_context": "",
+                            "bbox": None,
+                            "data": rows,
+                        }, previous_text))
+                        table_index += 1
+                elem.clear()
+
+    resolve_pending("")
+    content["pages"].append(page)
+    content["total_pages"] = len(content["pages"])
+    return content
@@ -0,0 +1,189 @@
+import os
+import re
+from typing import List, Optional, Tuple
+
+SECTION_RE = re.compile(r"\\(?:part|chapter|section|subsection|subsubsection)\*?\s*(?:\[[^\]]*\])?\s*\{")
+TABLE_ENV_RE = re.compile(r"\\begin\{(table\*?)\}(.*?)\\end\{\1\}", re.DOTALL)
+TABULAR_RE = re.compile(r"\\begin\{(tabular[x*]?|longtable|tabulary)\}(.*?)\\end\{\1\}", re.DOTALL)
+DROPPED_ENV_RE = re.compile(r"\\begin\{(figure\*?|thebibliography|tikzpicture|algorithm\*?|lstlisting|verbatim)\}.*?\\end\{\1\}", re.DOTALL)
+MATH_ENV_RE = re.compile(r"\\begin\{(equation\*?|align\*?|gather\*?|multline\*?|eqnarray\*?)\}(.*?)\\end\{\1\}", re.DOTALL)
+DROPPED_CMD_RE = re.compile(r"\\(?:cite[tp]?|ref|eqref|autoref|cref|Cref|label|url|footnote|thanks|includegraphics|bibliography|bibliographystyle)\*?\s*(?:\[[^\]]*\])*\s*\{[^{}]*\}")
+RULE_RE = re.compile(r"\\(?:hline|toprule|midrule|bottomrule|cline\{[^}]*\}|cmidrule(?:\([^)]*\))?\{[^}]*\}|endhead|endfirsthead|endfoot|endlastfoot)")
+MULTICOLUMN_RE = re.compile(r"\\multicolumn\{(\d+)\}\{[^}]*\}\{")
+MULTIROW_RE = re.compile(r"\\multirow\{[^}]*\}\{[^}]*\}\{")
+LABEL_RE = re.compile(r"\\label\s*\{([^{}]*)\}")
+AUX_LABEL_RE = re.compile(r"\\newlabel\{([^{}]*)\}\{\{([^{}]*)\}")
+
+def _strip_comments(text: str) -> str:
+    return re.sub(r"(?<!\\)%.*", "", text)
+
+
+def _braced(text: str, start: int) -> Tuple[str, int]:
+    # text[start] is just past an opening brace; returns the group content and the
+    # index after its closing brace.
+    depth = 1
+    i = start
+    while i < len(text) and depth:
+        if text[i] == "\\":
+            i += 2
+            continue
+        if text[i] == "{":
+            depth += 1
+        elif text[i] == "}":
+            depth -= 1
+        i += 1
+    return text[start:i - 1], i
+
+
+def _command_argument(text: str, command: str) -> Optional[str]:
+    m = re.search(r"\\" + command + r"\*?\s*(?:\[[^\]]*\])?\s*\{", text)
+    return _braced(text, m.end())[0] if m else None
+
+
+def latex_to_text(text: str) -> str:
+    text = DROPPED_CMD_RE.sub("", text)
+    text = MATH_ENV_RE.sub(lambda m: " " + m.group(2).strip() + " ", text)
+    text = re.sub(r"\\(?:begin|end)\{[^}]*\}(?:\[[^\]]*\])?(?:\{[^}]*\})?", " ", text)
+    text = text.replace("~", " ").replace("\\\\", "\n")
+    text = re.sub(r"\\([%&$#_{}])", r"\1", text)
+    # \cmd{arg} keeps arg (\emph, \textbf, ...); bare commands are dropped.
+    for _ in range(3):
+        text = re.sub(r"\\[a-zA-Z]+\*?\s*(?:\[[^\]]*\])?\{([^{}]*)\}", r"\1", text)
+    text = re.sub(r"\\[a-zA-Z]+\*?", "", text)
+    text = text.replace("{", "").replace("}", "")
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" ([.,;:])", r"\1", text)
+    return text.strip()
+
+
+def _cell_text(cell: str) -> List[Optional[str]]:
+    # Spanned cells are followed by None, matching what pdfplumber returns.
+    cell = cell.strip()
+    m = MULTICOLUMN_RE.match(cell)
+    if m:
+        content, _ = _braced(cell, m.end())
+        return [latex_to_text(content)] + [None] * (int(m.group(1)) - 1)
+    m = MULTIROW_RE.match(cell)
+    if m:
+        cell = _braced(cell, m.end())[0]
+    return [latex_to_text(cell)]
+
+
+def _tabular_rows(body: str) -> List[List[Optional[str]]]:
+    # Skip the column spec that directly follows \begin{tabular}.
+    body = body.lstrip()
+    if body.startswith("{"):
+        _, end = _braced(body, 1)
+        body = body[end:]
+    body = RULE_RE.sub("", body)
+
+    rows = []
+    for raw_row in re.split(r"\\\\(?:\[[^\]]*\])?", body):
+        if not raw_row.strip():
+            continue
+        cells = []
+        for cell in re.split(r"(?<!\\)&", raw_row):
+            cells.extend(_cell_text(cell))
+        if any(cells):
+            rows.append(cells)
+    return rows
+
+
+def _aux_labels(file_path: str) -> dict:
+    # Label numbers as LaTeX resolved them, from the .aux a compiled source ships with;
+    # without one, tables get no number rather than a guessed one.
+    aux_path = os.path.splitext(file_path)[0] + ".aux"
+    if not os.path.exists(aux_path):
+        return {}
+    with open(aux_path, "r", encoding="utf-8", errors="replace") as f:
+        return {label: latex_to_text(number) for label, number in AUX_LABEL_RE.findall(f.read())}
+
+
+def _table_caption(piece: str, caption: str, labels: dict) -> str:
+    caption = " ".join(caption.split())
+    label = LABEL_RE.search(piece)
+    number = labels.get(label.group(1)) if label else None
+    return f"Table {number}: {caption}" if number else caption
+
+
+def _paragraphs(text: str) -> List[str]:
+    return [p for p in (latex_to_text(part) for part in re.split(r"\n\s*\n", text)) if p]
+
+
+def _document_body(source: str) -> str:
+    source = _strip_comments(source)
+    m = re.search(r"\\begin\{document\}(.*?)(?:\\end\{document\}|$)", source, re.DOTALL)
+    body = m.group(1) if m else source
+    return DROPPED_ENV_RE.sub("", body)
+
+
+def _split_sections(body: str) -> List[Tuple[str, str]]:
+    # Each sectioning command starts a new "page"; text before the first one (title,
+    # abstract) is its own page.
+    sections = []
+    title, position = "", 0
+    for m in SECTION_RE.finditer(body):
+        if m.start() < position:
+            continue
+        sections.append((title, body[position:m.start()]))
+        title, position = _braced(body, m.end())
+    sections.append((title, body[position:]))
+    return [(latex_to_text(t), text) for t, text in sections if t or text.strip()]
+
+
+def build_latex_document(file_path: str) -> dict:
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        source = f.read()
+
+    content = {"pages": [], "tables": []}
+    labels = _aux_labels(file_path)
+    paper_title = latex_to_text(_command_argument(_strip_comments(source), "title") or "")
+    for page_no, (title, text) in enumerate(_split_sections(_document_body(source)), start=1):
+        page = {"page_no": page_no, "blocks": []}
+        table_index = 0
+        if page_no == 1 and paper_title and not title:
+            title = paper_title
+
+        # Tables are cut out of the running text; the paragraphs around them become
+        # the surrounding context, like the text above/below a table in a PDF.
+        pieces = []
+        position = 0
+        for m in list(TABLE_ENV_RE.finditer(text)) + [None]:
+            before = text[position:m.start()] if m else text[position:]
+            pieces.append(("text", before))
+            if m:
+                pieces.append(("table", m.group(2)))
+                position = m.end()
+
+        texts = [_paragraphs(piece) if kind == "text" else None for kind, piece in pieces]
+        if title:
+            page["blocks"].append({"text": title, "bbox": [], "block_id": 0})
+        for i, (kind, piece) in enumerate(pieces):
+            if kind == "text":
+                for paragraph in texts[i]:
+                    page["blocks"].append({"text": paragraph, "bbox": [], "block_id": len(page["blocks"])})
+                continue
+
+            caption = latex_to_text(_command_argument(piece, "caption") or "")
+            tabular = TABULAR_RE.search(piece)
+            if not tabular or not caption:
+                continue
+            rows = _tabular_rows(tabular.group(2))
+            if not rows:
+                continue
+            above = texts[i - 1][-1] if texts[i - 1] else ""
+            below = texts[i + 1][0] if i + 1 < len(texts) and texts[i + 1] else ""
+            content["tables"].append({
+                "page_no": page_no,
+                "table_index": table_index,
+                "caption": _table_caption(piece, caption, labels),
+                "surrounding_context": "\n".join(t for t in (above, below) if t),
+                "bbox": None,
+                "data": rows,
+            })
+            table_index += 1
+
+        content["pages"].append(page)
+
+    content["total_pages"] = len(content["pages"])
+    return content
@@ -0,0 +1,183 @@
+import multiprocessing
+import os
+import signal
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+from src.utils.logger import *
+
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+TIMEOUT_PER_FILE = 1800
+PROGRESS_EVERY = 10
+
+def _worker_loop(conn, fn, initializer=None, initargs=()):
+    # Each worker leads its own process group, so killing it also takes down the
+    # page-range processes it started.
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    if initializer:
+        initializer(*initargs)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        key, args = job
+        try:
+            conn.send((key, "ok", fn(*args)))
+        except Exception as e:
+            conn.send((key, "error", f"{e.__class__.__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, ctx, fn, initializer=None, initargs=()):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_loop, args=(child_conn, fn, initializer, initargs))
+        self.process.start()
+        child_conn.close()
+        self.key = None
+        self.started = None
+
+    def assign(self, key, args):
+        self.key = key
+        self.started = time.monotonic()
+        self.conn.send((key, args))
+
+    def release(self):
+        key, self.key, self.started = self.key, None, None
+        return key
+
+    def _kill_group(self):
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        self.process.kill()
+
+    def kill(self):
+        self._kill_group()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self._kill_group()
+            self.process.join()
+        self.conn.close()
+
+
+# Long-lived worker processes take one file at a time. A worker that segfaults (PyMuPDF,
+# pdfplumber) or runs past the per-file timeout is killed and replaced, so only that file
+# is lost and the rest of the batch carries on. Workers are not daemonic because large
+# PDFs fan out into page-range processes of their own; initializer(*initargs) runs once
+# in every worker, as with ProcessPoolExecutor. Once no files are left to hand out, idle
+# workers are stopped and on_retire() is called for each, so callers can give the freed
+# CPU to the files still being parsed.
+class ParsePool:
+    def __init__(self, fn, workers=None, timeout=TIMEOUT_PER_FILE, initializer=None, initargs=(), on_retire=None):
+        self.fn = fn
+        self.workers = workers or DEFAULT_WORKERS
+        self.timeout = timeout
+        self.initializer = initializer
+        self.initargs = initargs
+        self.on_retire = on_retire
+        self.ctx = multiprocessing.get_context("spawn")
+        self.counts = {"ok": 0, "failed": 0, "error": 0, "timeout": 0, "crashed": 0}
+        self.failures = {}
+
+    def _record(self, key, status, value, results):
+        if status == "ok" and value is None:
+            status = "failed"
+        self.counts[status] += 1
+        results[key] = value if status == "ok" else None
+        if status != "ok":
+            self.failures[key] = status if value is None else f"{status}: {value}"
+            log_warning(f"  -> {status.capitalize()}: {key}" + (f" ({value})" if status != "failed" else ""))
+
+    def _progress(self, done, total, started):
+        elapsed = time.monotonic() - started
+        rate = done / elapsed * 60 if elapsed else 0.0
+        failed = done - self.counts["ok"]
+        log_info(f"[{done}/{total}] {rate:.1f} files/min, {failed} failed")
+
+    def run(self, jobs):
+        # jobs: (key, args) pairs; returns {key: fn(*args)} with None for every failed file.
+        pending = deque(jobs)
+        total = len(pending)
+        results = {}
+        if not total:
+            return results
+
+        started = time.monotonic()
+        workers = [self._start_worker() for _ in range(min(self.workers, total))]
+        log_info(f"Started {len(workers)} parser processes (timeout {self.timeout}s per file)")
+        try:
+            self._serve(workers, pending, total, results, started)
+        except BaseException:
+            # Interrupted: no worker or page-range process may outlive the batch.
+            for worker in workers:
+                worker.kill()
+            raise
+
+        for worker in workers:
+            worker.stop()
+
+        elapsed = time.monotonic() - started
+        log_info(
+            f"Parsed {self.counts['ok']}/{total} files in {elapsed / 60:.1f} min "
+            f"({total / max(elapsed, 1e-9) * 60:.1f} files/min); failed {self.counts['failed']}, "
+            f"errors {self.counts['error']}, timeouts {self.counts['timeout']}, crashes {self.counts['crashed']}"
+        )
+        return results
+
+    def _start_worker(self):
+        return _Worker(self.ctx, self.fn, self.initializer, self.initargs)
+
+    def _serve(self, workers, pending, total, results, started):
+        while len(results) < total:
+            for worker in workers:
+                if worker.key is None and pending:
+                    key, args = pending.popleft()
+                    worker.assign(key, args)
+            for worker in [w for w in workers if w.key is None and not pending]:
+                worker.stop()
+                workers.remove(worker)
+                if self.on_retire:
+                    self.on_retire()
+
+            busy = [w for w in workers if w.key is not None]
+            wait([w.conn for w in busy] + [w.process.sentinel for w in busy], timeout=1)
+
+            for index, worker in enumerate(workers):
+                if worker.key is None:
+                    continue
+                outcome = None
+                if worker.conn.poll():
+                    try:
+                        outcome = worker.conn.recv()[1:]
+                    except EOFError:
+                        pass
+                if outcome is None and not worker.process.is_alive():
+                    outcome = ("crashed", f"exit code {worker.process.exitcode}")
+                elif outcome is None and self.timeout and time.monotonic() - worker.started > self.timeout:
+                    outcome = ("timeout", f"killed after {self.timeout}s")
+                if outcome is None:
+                    continue
+
+                self._record(worker.release(), *outcome, results)
+                if outcome[0] in ("crashed", "timeout"):
+                    worker.kill()
+                    # With nothing left to hand out, the dead worker is retired next round.
+                    if pending:
+                        workers[index] = self._start_worker()
+                if len(results) % PROGRESS_EVERY == 0 or len(results) == total:
+                    self._progress(len(results), total, started)
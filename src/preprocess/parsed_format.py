@@ -0,0 +1,283 @@
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+import argparse
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.append(PROJECT_ROOT)
+
+# Layout of a .pdoc file:
+#   MAGIC | page record ... | tables record | meta record | trailer
+# Every record is zlib-compressed compact JSON. The meta record holds the document
+# fields plus the (offset, length) of each page and of the tables, and the trailer
+# (meta offset, meta length, END_MAGIC) sits at the end so it can be found with a seek.
+MAGIC = b"PDOC1\n"
+END_MAGIC = b"PDOCEND\n"
+TRAILER = struct.Struct("<QQ")
+COMPRESS_LEVEL = 6
+EXTENSIONS = {"json": ".json", "binary": ".pdoc"}
+
+def _pack(obj) -> bytes:
+    return zlib.compress(json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), COMPRESS_LEVEL)
+
+
+def _unpack(data) -> object:
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def _write_meta(f, meta: dict):
+    offset = f.tell()
+    data = _pack(meta)
+    f.write(data)
+    f.write(TRAILER.pack(offset, len(data)) + END_MAGIC)
+    f.truncate()
+
+
+def _read_trailer(buf) -> tuple:
+    end = len(buf) - len(END_MAGIC)
+    if buf[:len(MAGIC)] != MAGIC or buf[end:] != END_MAGIC:
+        raise ValueError("not a parsed document (.pdoc) file")
+    return TRAILER.unpack(buf[end - TRAILER.size:end])
+
+
+def _indented(value, level: int) -> str:
+    return json.dumps(value, ensure_ascii=False, indent=4).replace("\n", "\n" + "    " * level)
+
+
+# Pages are written as they arrive and tables are spilled to a temporary file until the
+# pages are done, so a document is never held in memory whole.
+class _StreamingWriter:
+    def __init__(self, path: str, head: dict):
+        self.path = path
+        self.head = head
+        self.pages = 0
+        self.tables = 0
+        self._spill = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+
+    def add_table(self, table: dict):
+        self._spill.write(json.dumps(table, ensure_ascii=False) + "\n")
+        self.tables += 1
+
+    def discard(self):
+        self.f.close()
+        self._spill.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _spilled_tables(self):
+        self._spill.seek(0)
+        for line in self._spill:
+            yield json.loads(line)
+        self._spill.close()
+
+
+# Produces exactly the text json.dump(doc_data, f, indent=4) would.
+class JsonWriter(_StreamingWriter):
+    def __init__(self, path: str, head: dict):
+        super().__init__(path, head)
+        self.f = open(path, "w", encoding="utf-8")
+        self.f.write("{")
+        for key, value in head.items():
+            self.f.write(f"\n    {json.dumps(key)}: {_indented(value, 1)},")
+        self.f.write('\n    "pages": [')
+
+    def add_page(self, page: dict):
+        self.f.write(("," if self.pages else "") + "\n        " + _indented(page, 2))
+        self.pages += 1
+
+    def close(self, **tail):
+        self.f.write("\n    ]," if self.pages else "],")
+        self.f.write('\n    "tables": [')
+        for index, table in enumerate(self._spilled_tables()):
+            self.f.write(("," if index else "") + "\n        " + _indented(table, 2))
+        self.f.write("\n    ]" if self.tables else "]")
+        for key, value in tail.items():
+            self.f.write(f",\n    {json.dumps(key)}: {_indented(value, 1)}")
+        self.f.write("\n}")
+        self.f.close()
+
+
+class ParsedWriter(_StreamingWriter):
+    def __init__(self, path: str, head: dict):
+        super().__init__(path, head)
+        self.f = open(path, "wb")
+        self.f.write(MAGIC)
+        self.pages_index = []
+
+    def add_page(self, page: dict):
+        data = _pack(page)
+        self.pages_index.append([self.f.tell(), len(data)])
+        self.f.write(data)
+        self.pages += 1
+
+    def close(self, **tail):
+        start = self.f.tell()
+        compressor = zlib.compressobj(COMPRESS_LEVEL)
+        self.f.write(compressor.compress(b"["))
+        for index, table in enumerate(self._spilled_tables()):
+            record = ("," if index else "") + json.dumps(table, ensure_ascii=False, separators=(",", ":"))
+            self.f.write(compressor.compress(record.encode("utf-8")))
+        self.f.write(compressor.compress(b"]") + compressor.flush())
+        tables_index = [start, self.f.tell() - start]
+        _write_meta(self.f, {**self.head, **tail, "pages_index": self.pages_index, "tables_index": tables_index})
+        self.f.close()
+
+
+def open_writer(path: str, head: dict, parsed_format: str = "json"):
+    return ParsedWriter(path, head) if parsed_format == "binary" else JsonWriter(path, head)
+
+
+class ParsedDocument:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        offset, length = _read_trailer(self._buf)
+        self.meta = _unpack(self._buf[offset:offset + length])
+        self._pages_index = self.meta.pop("pages_index")
+        self._tables_index = self.meta.pop("tables_index")
+        self._tables = None
+
+    @property
+    def file_name(self):
+        return self.meta.get("file_name")
+
+    @property
+    def source_paths(self):
+        return self.meta.get("source_paths", [])
+
+    @property
+    def total_pages(self):
+        return self.meta.get("total_pages", len(self._pages_index))
+
+    @property
+    def tables(self) -> list:
+        if self._tables is None:
+            offset, length = self._tables_index
+            self._tables = _unpack(self._buf[offset:offset + length])
+        return self._tables
+
+    def page(self, index: int) -> dict:
+        offset, length = self._pages_index[index]
+        return _unpack(self._buf[offset:offset + length])
+
+    def iter_pages(self):
+        for index in range(len(self._pages_index)):
+            yield self.page(index)
+
+    def to_dict(self) -> dict:
+        return {**self.meta, "pages": list(self.iter_pages()), "tables": self.tables}
+
+    def close(self):
+        self._buf.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Same interface over a parsed JSON file, which is loaded whole.
+class JsonParsedDocument:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "r", encoding="utf-8") as f:
+            self.data = json.load(f)
+        self.meta = {k: v for k, v in self.data.items() if k not in ("pages", "tables")}
+
+    @property
+    def file_name(self):
+        return self.data.get("file_name")
+
+    @property
+    def source_paths(self):
+        return self.data.get("source_paths", [])
+
+    @property
+    def total_pages(self):
+        return self.data.get("total_pages", len(self.data.get("pages", [])))
+
+    @property
+    def tables(self) -> list:
+        return self.data.get("tables", [])
+
+    def page(self, index: int) -> dict:
+        return self.data["pages"][index]
+
+    def iter_pages(self):
+        return iter(self.data.get("pages", []))
+
+    def to_dict(self) -> dict:
+        return self.data
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_parsed(path: str):
+    if path.endswith(EXTENSIONS["binary"]):
+        return ParsedDocument(path)
+    return JsonParsedDocument(path)
+
+
+def write_parsed(path: str, doc_data: dict, parsed_format: str = "json"):
+    keys = list(doc_data)
+    split = keys.index("pages") if "pages" in keys else len(keys)
+    head = {k: doc_data[k] for k in keys[:split] if k not in ("pages", "tables")}
+    tail = {k: doc_data[k] for k in keys[split:] if k not in ("pages", "tables")}
+    writer = open_writer(path, head, parsed_format)
+    for page in doc_data.get("pages", []):
+        writer.add_page(page)
+    for table in doc_data.get("tables", []):
+        writer.add_table(table)
+    writer.close(**tail)
+
+
+def update_meta(path: str, **fields):
+    # Only the meta record is rewritten; page and table records stay where they are.
+    if not path.endswith(EXTENSIONS["binary"]):
+        with open(path, "r", encoding="utf-8") as f:
+            doc_data = json.load(f)
+        doc_data.update(fields)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(doc_data, f, ensure_ascii=False, indent=4)
+        return
+    with open(path, "r+b") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            offset, length = _read_trailer(buf)
+            meta = _unpack(buf[offset:offset + length])
+        meta.update(fields)
+        f.seek(offset)
+        _write_meta(f, meta)
+
+
+def export_json(path: str, json_path: str):
+    with open_parsed(path) as doc:
+        doc_data = doc.to_dict()
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(doc_data, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a binary parsed document (.pdoc) as JSON for debugging.")
+    parser.add_argument("path")
+    parser.add_argument("--output", help="JSON path (default: stdout)")
+    args = parser.parse_args()
+
+    if args.output:
+        export_json(args.path, args.output)
+    else:
+        with open_parsed(args.path) as doc:
+            json.dump(doc.to_dict(), sys.stdout, ensure_ascii=False, indent=4)
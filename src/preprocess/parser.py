@@ -1,30 +1,82 @@
 import os
-import json
 import fitz
 import pdfplumber
-from typing import Optional, Tuple
+import resource
+import multiprocessing
+from collections import deque
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 
-from src.preprocess.config import RAW_DATA_DIR, PARSED_JSON_DIR, ensure_dir_exists
+from src.preprocess.config import (
+    RAW_DATA_DIR, PARSED_JSON_DIR, CLEANED_JSON_DIR, CONTENT_STORE_DIR, LARGE_PDF_PAGES, PAGE_RANGE_SIZE, PAGE_RANGE_WORKERS,
+    CHECKPOINT_RANGES, TABLE_ENGINE, TABLE_PREFILTER, PARSED_FORMAT, PARSE_PROFILE, PARSE_PROFILE_DIR,
+    ensure_dir_exists,
+)
+from src.preprocess.build_cache import BuildCache, build_key
+from src.preprocess.checkpoints import RangeCheckpoints, document_checkpoints
+from src.preprocess.docx_parser import build_docx_document
+from src.preprocess.latex_parser import build_latex_document
+from src.preprocess.page_index import CharIndex
+from src.preprocess.parsed_format import EXTENSIONS, open_parsed, open_writer, update_meta
+from src.preprocess.profiler import NULL_PROFILE, ParseProfile, build_report, profile_paths
+from src.preprocess.table_candidates import is_table_candidate
+from src.preprocess.parse_pool import ParsePool, DEFAULT_WORKERS, TIMEOUT_PER_FILE
+from src.utils.content_store import ContentStore, sha256_file
 from src.utils.logger import *
 
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".tex")
+
+# Bump whenever a parser change alters the parsed output; cached documents built by an
+# older version are then re-parsed.
+PARSER_VERSION = 3
+
+# Cores the file workers leave free, shared by their page-range pools. parse_all_documents
+# hands it to every worker and adds a core whenever a file worker retires; outside it
+# (None) a large PDF simply gets PAGE_RANGE_WORKERS processes.
+_spare_cores = None
+
+def set_spare_cores(spare_cores):
+    global _spare_cores
+    _spare_cores = spare_cores
+
+
+def _take_cores(wanted: int) -> int:
+    if _spare_cores is None or wanted <= 0:
+        return 0
+    with _spare_cores.get_lock():
+        taken = min(wanted, _spare_cores.value)
+        _spare_cores.value -= taken
+    return taken
+
+
+def _return_cores(spare_cores, count: int):
+    if spare_cores is None or count <= 0:
+        return
+    with spare_cores.get_lock():
+        spare_cores.value += count
+
+
 def _clean_caption_text(text: str) -> str:
     if not text: return ""
     lines = [line.strip() for line in text.split('\n') if line.strip()]
     return " ".join(lines)
 
 
-def _find_table_caption_and_context(page: pdfplumber.page.Page, table_bbox: tuple) -> Tuple[Optional[str], str]:
+def _caption_and_context(extract_text, width: float, height: float, table_bbox: tuple) -> Tuple[Optional[str], str]:
+    # extract_text(box) returns the text inside a (x0, top, x1, bottom) box, so both
+    # table engines share the caption and context geometry.
     (x0, top, x1, bottom) = table_bbox
     caption = None
     H_PADDING = 50 
     search_x0 = max(0, x0 - H_PADDING)
-    search_x1 = min(page.width, x1 + H_PADDING)
+    search_x1 = min(width, x1 + H_PADDING)
     
     search_box_above = (search_x0, max(0, top - 20), search_x1, top)
-    search_box_below = (search_x0, bottom, search_x1, min(page.height, bottom + 20))
+    search_box_below = (search_x0, bottom, search_x1, min(height, bottom + 20))
 
-    caption_above = _clean_caption_text(page.crop(search_box_above).extract_text(x_tolerance=3))
-    caption_below = _clean_caption_text(page.crop(search_box_below).extract_text(x_tolerance=3))
+    caption_above = _clean_caption_text(extract_text(search_box_above))
+    caption_below = _clean_caption_text(extract_text(search_box_below))
     
     if "bảng" in caption_above.lower() or "table" in caption_above.lower():
         caption = caption_above
@@ -32,67 +84,121 @@ def _find_table_caption_and_context(page: pdfplumber.page.Page, table_bbox: tupl
         caption = caption_below
 
     context_height = 75
-    context_box_above = (0, max(0, top - context_height), page.width, top)
-    context_box_below = (0, bottom, page.width, min(page.height, bottom + context_height))
+    context_box_above = (0, max(0, top - context_height), width, top)
+    context_box_below = (0, bottom, width, min(height, bottom + context_height))
     
-    text_above = _clean_caption_text(page.crop(context_box_above).extract_text(x_tolerance=3))
-    text_below = _clean_caption_text(page.crop(context_box_below).extract_text(x_tolerance=3))
+    text_above = _clean_caption_text(extract_text(context_box_above))
+    text_below = _clean_caption_text(extract_text(context_box_below))
     surrounding_context = (text_above + "\n" + text_below).strip()
     return caption, surrounding_context
 
 
-def extract_tables(pdf_path: str):
-    all_tables = []
+def _find_table_caption_and_context(page: pdfplumber.page.Page, table_bbox: tuple, index: CharIndex) -> Tuple[Optional[str], str]:
+    return _caption_and_context(
+        lambda box: index.extract_text(box, x_tolerance=3), page.width, page.height, table_bbox
+    )
+
+
+def iter_tables(pdf_path: str, pages: Optional[List[int]] = None, profile=NULL_PROFILE):
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_index, page in enumerate(pdf.pages):
-                tables_on_page = page.find_tables()
-                if not tables_on_page: continue
+        with pdfplumber.open(pdf_path, pages=pages) as pdf:
+            for page in pdf.pages:
+                page_no = page.page_number
+                with profile.timed("find_tables", page_no):
+                    tables_on_page = page.find_tables()
+                if tables_on_page:
+                    with profile.timed("caption_context", page_no):
+                        index = CharIndex(page)
+                    for table_index, table in enumerate(tables_on_page):
+                        with profile.timed("table_extract", page_no):
+                            table_data = table.extract()
+                        if not table_data: continue
+                        with profile.timed("caption_context", page_no):
+                            caption, surrounding_context = _find_table_caption_and_context(page, table.bbox, index)
+                        if caption: 
+                            profile.count(page_no, tables=1)
+                            yield {
+                                "page_no": page.page_number,
+                                "table_index": table_index,
+                                "caption": caption,
+                                "surrounding_context": surrounding_context,
+                                "bbox": table.bbox, 
+                                "data": table_data 
+                            }
+                # Drops the page's cached layout objects, which pdfplumber would
+                # otherwise keep for every page until the file is closed.
+                page.close()
+    except Exception as e:
+        log_error(f"PDFPlumber table error: {e}")
+
+
+def iter_tables_pymupdf(pdf_path: str, pages: Optional[List[int]] = None, profile=NULL_PROFILE):
+    try:
+        with fitz.open(pdf_path) as doc:
+            for page_no in pages or range(1, doc.page_count + 1):
+                page = doc.load_page(page_no - 1)
+                with profile.timed("find_tables", page_no):
+                    tables_on_page = page.find_tables().tables
                 for table_index, table in enumerate(tables_on_page):
-                    table_data = table.extract()
+                    with profile.timed("table_extract", page_no):
+                        table_data = table.extract()
                     if not table_data: continue
-                    caption, surrounding_context = _find_table_caption_and_context(page, table.bbox)
-                    if caption: 
-                        all_tables.append({
-                            "page_no": page_index + 1,
+                    with profile.timed("caption_context", page_no):
+                        caption, surrounding_context = _caption_and_context(
+                            lambda box: page.get_text("text", clip=fitz.Rect(box)),
+                            page.rect.width, page.rect.height, tuple(table.bbox)
+                        )
+                    if caption:
+                        profile.count(page_no, tables=1)
+                        yield {
+                            "page_no": page_no,
                             "table_index": table_index,
                             "caption": caption,
                             "surrounding_context": surrounding_context,
-                            "bbox": table.bbox, 
-                            "data": table_data 
-                        })
+                            "bbox": tuple(table.bbox),
+                            "data": table_data
+                        }
     except Exception as e:
-        log_error(f"PDFPlumber table error: {e}")
-    return all_tables
+        log_error(f"PyMuPDF table error: {e}")
+
+
+def extract_tables(pdf_path: str, pages: Optional[List[int]] = None):
+    return list(iter_tables(pdf_path, pages))
+
+
+def extract_tables_pymupdf(pdf_path: str, pages: Optional[List[int]] = None):
+    return list(iter_tables_pymupdf(pdf_path, pages))
+
 
+TABLE_EXTRACTORS = {
+    "pdfplumber": iter_tables,
+    "pymupdf": iter_tables_pymupdf,
+}
 
-def parse_single_pdf_combined(file_path: str) -> Optional[str]:
+
+def _raw_rel_path(file_path: str) -> str:
     try:
-        rel_path = os.path.relpath(file_path, RAW_DATA_DIR)
+        return os.path.relpath(file_path, RAW_DATA_DIR)
     except ValueError:
-        rel_path = os.path.basename(file_path)
+        return os.path.basename(file_path)
 
-    output_rel_path = os.path.splitext(rel_path)[0] + ".json"
-    output_path = os.path.join(PARSED_JSON_DIR, output_rel_path)
-    
-    ensure_dir_exists(os.path.dirname(output_path))
 
-    if os.path.exists(output_path):
-        log_info(f"  -> Skipped (Exists): {output_rel_path}")
-        return output_path
+def _update_source_paths(output_path: str, source_paths: List[str]):
+    with open_parsed(output_path) as doc:
+        current = doc.source_paths
+    if sorted(current) == sorted(source_paths):
+        return
+    update_meta(output_path, source_paths=source_paths)
+    log_info(f"  -> Updated origins: {len(source_paths)} raw paths")
 
-    log_info(f"Parsing: {rel_path}")
-    
-    doc_data = {
-        "file_name": os.path.basename(file_path),
-        "pages": [],
-        "tables": []
-    }
-    
-    try:
-        with fitz.open(file_path) as doc:
-            doc_data["total_pages"] = doc.page_count
-            for page_num in range(doc.page_count):
+
+# Parsed content is produced as ("page", page), ("table", table) and ("meta", fields)
+# events, so a document can be written out while it is parsed.
+def iter_pdf_range(file_path: str, start: int, end: int, profile=NULL_PROFILE):
+    table_pages = []
+    with fitz.open(file_path) as doc:
+        for page_num in range(start, end):
+            with profile.timed("text", page_num + 1):
                 page = doc.load_page(page_num)
                 blocks = page.get_text("blocks") 
                 page_content = { "page_no": page_num + 1, "blocks": [] }
@@ -103,37 +209,303 @@ def parse_single_pdf_combined(file_path: str) -> Optional[str]:
                             "bbox": list(block[:4]),
                             "block_id": block[5]
                         })
-                doc_data["pages"].append(page_content)
+            page_text = "\n".join(block["text"] for block in page_content["blocks"])
+            profile.count(page_num + 1, chars=len(page_text), blocks=len(page_content["blocks"]))
+            yield "page", page_content
+
+            with profile.timed("prefilter", page_num + 1):
+                candidate = not TABLE_PREFILTER or is_table_candidate(page, page_text)
+            if candidate:
+                table_pages.append(page_num + 1)
+
+    # Table extraction is the expensive part, so it only runs on candidate pages.
+    if table_pages:
+        for table in TABLE_EXTRACTORS[TABLE_ENGINE](file_path, table_pages, profile):
+            yield "table", table
+
+
+def collect_events(events) -> dict:
+    content = {"pages": [], "tables": []}
+    for kind, item in events:
+        if kind == "meta":
+            content.update(item)
+        else:
+            content[kind + "s"].append(item)
+    return content
+
+
+def content_events(content: dict):
+    for page in content.get("pages", []):
+        yield "page", page
+    for table in content.get("tables", []):
+        yield "table", table
+    yield "meta", {k: v for k, v in content.items() if k not in ("pages", "tables")}
+
+
+def build_pdf_range(file_path: str, start: int, end: int, profile_args: Optional[tuple] = None, checkpoints: Optional[RangeCheckpoints] = None) -> dict:
+    # profile_args: (label, journal) of the document's profile when profiling is on.
+    profile = ParseProfile(*profile_args) if profile_args else NULL_PROFILE
+    content = collect_events(iter_pdf_range(file_path, start, end, profile))
+    # Saved by the worker itself, so a finished range survives even if the ranges
+    # before it never complete.
+    if checkpoints:
+        with profile.timed("checkpoint"):
+            checkpoints.save(start, end, content)
+    if profile_args:
+        profile.close()
+        content["profile"] = profile.to_dict()
+    return content
+
+
+def _iter_range_parts(file_path: str, ranges: deque, profile_args: Optional[tuple], checkpoints: Optional[RangeCheckpoints]):
+    # Ranges are consumed in submission order, so pages and tables stay in document
+    # order. Only two ranges per running process are in flight, which bounds how many
+    # finished ranges can wait in memory.
+    max_workers = min(PAGE_RANGE_WORKERS, len(ranges))
+    if max_workers <= 1:
+        for start, end in ranges:
+            yield build_pdf_range(file_path, start, end, profile_args, checkpoints)
+        return
+
+    # Under parse_all_documents this worker's own core plus any spare ones, re-checked
+    # after every range, so a large PDF left at the end of a run picks up the cores of
+    # file workers that have gone idle.
+    taken = 0
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            in_flight = deque()
+            while ranges or in_flight:
+                if _spare_cores is None:
+                    running = max_workers
+                else:
+                    taken += _take_cores(max_workers - 1 - taken)
+                    running = 1 + taken
+                while ranges and len(in_flight) < 2 * running and sum(not f.done() for f in in_flight) < running:
+                    in_flight.append(executor.submit(build_pdf_range, file_path, *ranges.popleft(), profile_args, checkpoints))
+                yield in_flight.popleft().result()
+    finally:
+        _return_cores(_spare_cores, taken)
 
-        doc_data["tables"] = extract_tables(file_path)
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(doc_data, f, ensure_ascii=False, indent=4)
-            
-        log_info(f"  -> Saved: {output_rel_path}")
+def _iter_pdf_ranges(file_path: str, total_pages: int, profile=NULL_PROFILE, checkpoints: Optional[RangeCheckpoints] = None):
+    ranges = [(start, min(start + PAGE_RANGE_SIZE, total_pages)) for start in range(0, total_pages, PAGE_RANGE_SIZE)]
+    saved = {r for r in ranges if checkpoints and checkpoints.exists(*r)}
+    if saved:
+        log_info(f"  -> Resuming {total_pages} pages: {len(saved)}/{len(ranges)} ranges checkpointed")
+    else:
+        log_info(f"  -> Splitting {total_pages} pages into {len(ranges)} ranges")
+
+    profile_args = (profile.file_path, profile.journal) if profile is not NULL_PROFILE else None
+    parts = _iter_range_parts(file_path, deque(r for r in ranges if r not in saved), profile_args, checkpoints)
+    try:
+        for r in ranges:
+            part = checkpoints.load(*r) if r in saved else next(parts)
+            if part is None:
+                part = build_pdf_range(file_path, *r, profile_args, checkpoints)
+            if "profile" in part:
+                profile.merge(part.pop("profile"))
+            yield from content_events(part)
+    finally:
+        parts.close()
+
+
+def iter_pdf_document(file_path: str, profile=NULL_PROFILE, checkpoints: Optional[RangeCheckpoints] = None):
+    with fitz.open(file_path) as doc:
+        total_pages = doc.page_count
+
+    if total_pages >= LARGE_PDF_PAGES:
+        for kind, item in _iter_pdf_ranges(file_path, total_pages, profile, checkpoints if CHECKPOINT_RANGES else None):
+            if kind != "meta":
+                yield kind, item
+    else:
+        yield from iter_pdf_range(file_path, 0, total_pages, profile)
+    yield "meta", {"total_pages": total_pages}
+
+
+def build_pdf_document(file_path: str) -> dict:
+    return collect_events(iter_pdf_document(file_path))
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux; children covers finished page-range workers.
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak / 1024
+
+
+def parse_build_key(content_hash: str) -> str:
+    params = {"table_engine": TABLE_ENGINE, "table_prefilter": TABLE_PREFILTER}
+    return build_key("parse", content_hash, PARSER_VERSION, params)
+
+
+def _parse_single(file_path: str, source_paths: Optional[List[str]], build_events, content_hash: Optional[str] = None) -> Optional[str]:
+    rel_path = _raw_rel_path(file_path)
+    raw_rel_paths = [_raw_rel_path(p) for p in (source_paths or [file_path])]
+
+    output_rel_path = os.path.splitext(rel_path)[0] + EXTENSIONS[PARSED_FORMAT]
+    output_path = os.path.join(PARSED_JSON_DIR, output_rel_path)
+    
+    ensure_dir_exists(os.path.dirname(output_path))
+
+    content_hash = content_hash or sha256_file(file_path)
+    key = parse_build_key(content_hash)
+    cache = BuildCache()
+    try:
+        if cache.is_fresh(output_path, key):
+            log_info(f"  -> Skipped (Cached): {output_rel_path}")
+            if source_paths:
+                _update_source_paths(output_path, raw_rel_paths)
+            return output_path
+        if os.path.exists(output_path):
+            log_info(f"  -> Stale: {output_rel_path}")
+    finally:
+        cache.close()
+
+    log_info(f"Parsing: {rel_path}")
+    
+    head = {
+        "file_name": os.path.basename(file_path),
+        "source_paths": raw_rel_paths,
+    }
+    
+    # Written under a temporary name so a worker killed mid-write never leaves a
+    # truncated file that later runs would skip as already parsed. Pages go to disk as
+    # they are parsed, so memory does not grow with document length.
+    tmp_path = output_path + ".part"
+    writer = None
+    profile = NULL_PROFILE
+    if PARSE_PROFILE:
+        profile_path, journal_path = profile_paths(PARSE_PROFILE_DIR, rel_path)
+        for path in (profile_path, journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        profile = ParseProfile(rel_path, journal_path)
+    checkpoints = document_checkpoints(rel_path, key)
+    try:
+        writer = open_writer(tmp_path, head, PARSED_FORMAT)
+        tail = {}
+        for kind, item in build_events(file_path, profile, checkpoints):
+            if kind == "page":
+                writer.add_page(item)
+            elif kind == "table":
+                writer.add_table(item)
+            else:
+                tail.update(item)
+        writer.close(**tail)
+        writer = None
+        os.replace(tmp_path, output_path)
+        # A copy in the other format would be cleaned as a second document.
+        for extension in EXTENSIONS.values():
+            sibling = os.path.splitext(output_path)[0] + extension
+            if sibling != output_path and os.path.exists(sibling):
+                os.remove(sibling)
+
+        cache = BuildCache()
+        cache.record(output_path, "parse", key, content_hash)
+        cache.close()
+        checkpoints.clear()
+
+        if PARSE_PROFILE:
+            profile.finish(profile_path, "ok")
+        log_info(f"  -> Saved: {output_rel_path} (peak RSS {_peak_rss_mb():.0f} MB)")
         return output_path 
         
     except Exception as e:
         log_error(f"Critical error parsing {file_path}: {e}")
-        if os.path.exists(output_path):
-            os.remove(output_path)
+        if PARSE_PROFILE:
+            profile.finish(profile_path, "error")
+        saved_ranges = checkpoints.count()
+        if saved_ranges:
+            log_info(f"  -> Kept {saved_ranges} checkpointed page ranges for the next run")
+        if writer:
+            writer.discard()
+        for path in (tmp_path, output_path):
+            if os.path.exists(path):
+                os.remove(path)
         return None
 
 
-def get_all_pdf_files(root_dir: str):
-    pdf_files = []
+def parse_single_pdf_combined(file_path: str, source_paths: Optional[List[str]] = None, content_hash: Optional[str] = None) -> Optional[str]:
+    return _parse_single(file_path, source_paths, iter_pdf_document, content_hash)
+
+
+# DOCX and LaTeX documents are built whole, so they are profiled as a single "build" phase.
+def _whole_document_events(build_document):
+    def build_events(file_path: str, profile, checkpoints=None):
+        with profile.timed("build"):
+            content = build_document(file_path)
+        return content_events(content)
+    return build_events
+
+
+def parse_single_docx(file_path: str, source_paths: Optional[List[str]] = None, content_hash: Optional[str] = None) -> Optional[str]:
+    return _parse_single(file_path, source_paths, _whole_document_events(build_docx_document), content_hash)
+
+
+def parse_single_latex(file_path: str, source_paths: Optional[List[str]] = None, content_hash: Optional[str] = None) -> Optional[str]:
+    return _parse_single(file_path, source_paths, _whole_document_events(build_latex_document), content_hash)
+
+
+def parse_document(file_path: str, source_paths: Optional[List[str]] = None, content_hash: Optional[str] = None) -> Optional[str]:
+    if file_path.lower().endswith(".docx"):
+        return parse_single_docx(file_path, source_paths, content_hash)
+    if file_path.lower().endswith(".tex"):
+        return parse_single_latex(file_path, source_paths, content_hash)
+    return parse_single_pdf_combined(file_path, source_paths, content_hash)
+
+
+def get_all_source_files(root_dir: str, extensions=(".pdf",)):
+    source_files = []
     for root, _, files in os.walk(root_dir):
         for f in files:
-            if f.lower().endswith(".pdf"):
-                pdf_files.append(os.path.join(root, f))
-    return pdf_files
+            if f.lower().endswith(extensions):
+                source_files.append(os.path.join(root, f))
+    return source_files
 
 
-def parse_all_documents():
+def _remove_member_outputs(cache: BuildCache, file_path: str, canonical_path: str):
+    # Only the canonical path of a content group is parsed; outputs left under another
+    # member's name would be chunked a second time.
+    stem = os.path.splitext(_raw_rel_path(file_path))[0]
+    if stem == os.path.splitext(_raw_rel_path(canonical_path))[0]:
+        return
+    outputs = [os.path.join(PARSED_JSON_DIR, stem + extension) for extension in EXTENSIONS.values()]
+    outputs.append(os.path.join(CLEANED_JSON_DIR, stem + ".json"))
+    for path in outputs:
+        if os.path.exists(path):
+            os.remove(path)
+            log_info(f"  -> Removed duplicate output: {path}")
+        cache.forget(path)
+
+
+def parse_all_documents(workers: int = DEFAULT_WORKERS, timeout: Optional[float] = TIMEOUT_PER_FILE):
     ensure_dir_exists(PARSED_JSON_DIR)
-    pdf_files = get_all_pdf_files(RAW_DATA_DIR)
-    log_info(f"Found {len(pdf_files)} PDF files to parse.\n")
+    source_files = get_all_source_files(RAW_DATA_DIR, SUPPORTED_EXTENSIONS)
+    log_info(f"Found {len(source_files)} PDF/DOCX/LaTeX files to parse.\n")
+
+    # Identical files are parsed once; the parsed document keeps every raw path as an origin.
+    store = ContentStore(CONTENT_STORE_DIR)
+    groups = list(store.group_by_content(source_files).items())
+    store.close()
+
+    cache = BuildCache()
+    for _, paths in groups:
+        for file_path in paths[1:]:
+            _remove_member_outputs(cache, file_path, paths[0])
+    cache.close()
+
+    # Largest files first, so a huge spec does not start last and hold up the batch.
+    groups.sort(key=lambda group: os.path.getsize(group[1][0]), reverse=True)
 
-    for index, file_path in enumerate(pdf_files):
-        log_info(f"[{index + 1}/{len(pdf_files)}] Processing...")
-        parse_single_pdf_combined(file_path)
+    # Page-range processes only use cores no file worker needs, so the two levels never
+    # oversubscribe the CPU; every file worker that retires frees one more.
+    file_workers = min(workers or DEFAULT_WORKERS, len(groups))
+    spare_cores = multiprocessing.get_context("spawn").Value("i", max(0, (os.cpu_count() or 1) - file_workers))
+    log_info(f"{spare_cores.value} spare cores for page-range workers at start (page_range_workers {PAGE_RANGE_WORKERS} per large PDF)")
+    pool = ParsePool(
+        parse_document, workers=workers, timeout=timeout, initializer=set_spare_cores, initargs=(spare_cores,),
+        on_retire=partial(_return_cores, spare_cores, 1),
+    )
+    pool.run([(paths[0], (paths[0], paths, content_hash)) for content_hash, paths in groups])
+    if PARSE_PROFILE:
+        build_report(failures={_raw_rel_path(path): status for path, status in pool.failures.items()})
+    return pool.failures
@@ -1,16 +1,18 @@
 import os
 import sys
+import argparse
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 sys.path.append(PROJECT_ROOT)
 
-from src.preprocess.parser import parse_all_documents, parse_single_pdf_combined
+from src.preprocess.parser import parse_all_documents, parse_document
+from src.preprocess.parse_pool import DEFAULT_WORKERS, TIMEOUT_PER_FILE
 from src.preprocess.cleaner import clean_all_parsed_documents, clean_and_chunk_data
 from src.utils.logger import log_info
 
 def preprocess_file(file_path: str):
     ("--- Parsing ---")
-    parsed_file = parse_single_pdf_combined(file_path)
+    parsed_file = parse_document(file_path)
     log_info("--- Parsing Complete ---")
     log_info("--- Cleaning and Chunking ---")
     cleaned_file = clean_and_chunk_data(parsed_file)
@@ -18,8 +20,13 @@ def preprocess_file(file_path: str):
     return cleaned_file
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse, clean and chunk the raw corpus.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parser processes to run in parallel")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT_PER_FILE, help="seconds before a file's parser is killed (0 disables)")
+    args = parser.parse_args()
+
     log_info("========== START PARSING AND CLEANING PIPELINE ==========")
-    parse_all_documents()
+    parse_all_documents(workers=args.workers, timeout=args.timeout or None)
     log_info("--- Parsing Complete ---")
     clean_all_parsed_documents()
-    log_info("========== PIPELINE ENDED SUCCESSFULLY ==========")
\ No newline at end of file
+    log_info("========== PIPELINE ENDED SUCCESSFULLY ==========")
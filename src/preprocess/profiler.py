@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import argparse
+from contextlib import contextmanager
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.append(PROJECT_ROOT)
+
+from src.preprocess.config import PARSE_PROFILE_DIR
+from src.utils.logger import *
+
+REPORT_FILE = "report.json"
+JOURNAL_EXTENSION = ".jsonl"
+TOP_N = 20
+
+# Seconds per phase, plus char/block/table counts, for every page of one document.
+# Page-range workers build their own profile and the parent merges the page records.
+# With a journal path every phase start/end is also appended there as it happens, so a
+# parse that is killed (timeout, crash) still leaves a profile showing where it was.
+class ParseProfile:
+    def __init__(self, file_path: str, journal: str = None):
+        self.file_path = file_path
+        self.journal = journal
+        self.pages = {}
+        self.phases = {}
+        self.started = time.perf_counter()
+        self.status = None
+        self._journal_file = None
+
+    def page(self, page_no: int) -> dict:
+        return self.pages.setdefault(page_no, {"page_no": page_no, "seconds": 0.0, "phases": {}, "chars": 0, "blocks": 0, "tables": 0})
+
+    def _log(self, **event):
+        if not self.journal:
+            return
+        if self._journal_file is None:
+            os.makedirs(os.path.dirname(self.journal), exist_ok=True)
+            # Line-buffered appends: each event reaches the file in one write, and
+            # page-range workers can share the journal.
+            self._journal_file = open(self.journal, "a", encoding="utf-8", buffering=1)
+            self._journal_file.write(json.dumps({"t": round(time.time(), 3), "file": self.file_path}) + "\n")
+        self._journal_file.write(json.dumps({"t": round(time.time(), 3), **event}) + "\n")
+
+    def _add(self, phase: str, page_no: int, elapsed: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+        if page_no is not None:
+            record = self.page(page_no)
+            record["phases"][phase] = record["phases"].get(phase, 0.0) + elapsed
+            record["seconds"] += elapsed
+
+    @contextmanager
+    def timed(self, phase: str, page_no: int = None):
+        self._log(phase=phase, page_no=page_no)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._add(phase, page_no, elapsed)
+            self._log(phase=phase, page_no=page_no, seconds=round(elapsed, 6))
+
+    def count(self, page_no: int, **counts):
+        record = self.page(page_no)
+        for name, value in counts.items():
+            record[name] += value
+        self._log(page_no=page_no, counts=counts)
+
+    def merge(self, other: dict):
+        for record in other["pages"]:
+            self.pages[record["page_no"]] = record
+        for phase, seconds in other["phases"].items():
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def to_dict(self) -> dict:
+        pages = [self.pages[page_no] for page_no in sorted(self.pages)]
+        return {
+            "file": self.file_path,
+            "status": self.status,
+            "seconds": round(time.perf_counter() - self.started, 3),
+            "page_count": len(pages),
+            "phases": {phase: round(seconds, 3) for phase, seconds in sorted(self.phases.items())},
+            "chars": sum(p["chars"] for p in pages),
+            "tables": sum(p["tables"] for p in pages),
+            "pages": pages,
+        }
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=4)
+
+    def close(self):
+        if self._journal_file:
+            self._journal_file.close()
+            self._journal_file = None
+
+    def finish(self, path: str, status: str):
+        # The summary replaces the journal once the parse has ended either way.
+        self.status = status
+        self.close()
+        self.save(path)
+        if self.journal and os.path.exists(self.journal):
+            os.remove(self.journal)
+
+
+def profile_paths(profile_dir: str, rel_path: str) -> tuple:
+    stem = os.path.join(profile_dir, os.path.splitext(rel_path)[0])
+    return stem + ".json", stem + JOURNAL_EXTENSION
+
+
+def profile_from_journal(journal: str, file_path: str) -> dict:
+    # Rebuilds the profile of a parse that never finished; phases that started but did
+    # not end are where it was when it was killed.
+    profile = ParseProfile(file_path)
+    open_phases = {}
+    first = last = None
+    with open(journal, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            first = event["t"] if first is None else first
+            last = event["t"]
+            if "file" in event:
+                profile.file_path = event["file"]
+                continue
+            if "counts" in event:
+                profile.count(event["page_no"], **event["counts"])
+                continue
+            key = (event["phase"], event["page_no"])
+            if "seconds" in event:
+                profile._add(event["phase"], event["page_no"], event["seconds"])
+                open_phases.pop(key, None)
+            else:
+                open_phases[key] = event["t"]
+    data = profile.to_dict()
+    data["seconds"] = round(last - first, 3) if first is not None else 0.0
+    data["in_progress"] = [
+        {"phase": phase, "page_no": page_no, "started_after": round(started - first, 3)}
+        for (phase, page_no), started in sorted(open_phases.items(), key=lambda item: item[1])
+    ]
+    return data
+
+
+# Stands in when profiling is off, so call sites do not need to check.
+class NullProfile:
+    journal = None
+
+    @contextmanager
+    def timed(self, phase: str, page_no: int = None):
+        yield
+
+    def count(self, page_no: int, **counts):
+        pass
+
+    def merge(self, other: dict):
+        pass
+
+    def to_dict(self) -> dict:
+        return None
+
+
+NULL_PROFILE = NullProfile()
+
+def _slowest_phase(phases: dict) -> str:
+    return max(phases, key=phases.get) if phases else None
+
+
+def _load_profiles(profile_dir: str):
+    for root, _, files in os.walk(profile_dir):
+        for file_name in files:
+            path = os.path.join(root, file_name)
+            if file_name.endswith(JOURNAL_EXTENSION):
+                # Journals only outlive parses that were killed before they could finish.
+                rel_path = os.path.relpath(os.path.splitext(path)[0], profile_dir)
+                yield profile_from_journal(path, rel_path)
+            elif file_name.endswith(".json") and path != os.path.join(profile_dir, REPORT_FILE):
+                with open(path, "r", encoding="utf-8") as f:
+                    yield json.load(f)
+
+
+def build_report(profile_dir: str = PARSE_PROFILE_DIR, top_n: int = TOP_N, failures: dict = None) -> dict:
+    # failures: {raw rel path: status} from the parse pool, e.g. timeouts and crashes.
+    failures = failures or {}
+    by_stem = {os.path.splitext(rel_path)[0]: status for rel_path, status in failures.items()}
+    documents, pages, phases, failed = [], [], {}, []
+    for profile in _load_profiles(profile_dir):
+        status = by_stem.get(os.path.splitext(profile["file"])[0]) or profile.get("status")
+        if "in_progress" in profile or status not in (None, "ok"):
+            failed.append({
+                "file": profile["file"],
+                "status": status or "killed",
+                "seconds": profile["seconds"],
+                "pages_profiled": profile["page_count"],
+                "in_progress": profile.get("in_progress", []),
+                "slowest_phase": _slowest_phase(profile["phases"]),
+            })
+        documents.append({
+            "file": profile["file"],
+            "seconds": profile["seconds"],
+            "page_count": profile["page_count"],
+            "seconds_per_page": round(profile["seconds"] / max(profile["page_count"], 1), 3),
+            "slowest_phase": _slowest_phase(profile["phases"]),
+            "phases": profile["phases"],
+        })
+        for phase, seconds in profile["phases"].items():
+            phases[phase] = phases.get(phase, 0.0) + seconds
+        for page in profile["pages"]:
+            pages.append({
+                "file": profile["file"],
+                "page_no": page["page_no"],
+                "seconds": round(page["seconds"], 3),
+                "slowest_phase": _slowest_phase(page["phases"]),
+                "chars": page["chars"],
+                "tables": page["tables"],
+            })
+
+    report = {
+        "documents": len(documents),
+        "failed_documents": failed,
+        "pages": len(pages),
+        "phases": {phase: round(seconds, 3) for phase, seconds in sorted(phases.items(), key=lambda item: -item[1])},
+        "slowest_documents": sorted(documents, key=lambda d: -d["seconds"])[:top_n],
+        "slowest_pages": sorted(pages, key=lambda p: -p["seconds"])[:top_n],
+    }
+    with open(os.path.join(profile_dir, REPORT_FILE), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+
+    log_info(f"Parse profile: {len(documents)} documents, {len(pages)} pages; time by phase: {report['phases']}")
+    for d in failed:
+        where = ", ".join(f"{p['phase']} on p.{p['page_no']}" for p in d["in_progress"])
+        where = where or f"between phases, {d['pages_profiled']} pages profiled"
+        log_warning(f"  failed document: {d['file']} {d['status']} after {d['seconds']:.1f}s (in progress: {where})")
+    for d in report["slowest_documents"][:5]:
+        log_info(f"  slow document: {d['file']} {d['seconds']:.1f}s ({d['seconds_per_page']:.2f}s/page, mostly {d['slowest_phase']})")
+    for p in report["slowest_pages"][:5]:
+        log_info(f"  slow page: {p['file']} p.{p['page_no']} {p['seconds']:.2f}s (mostly {p['slowest_phase']}, {p['tables']} tables)")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise per-document parse profiles into a slowest pages/documents report.")
+    parser.add_argument("--profile-dir", default=PARSE_PROFILE_DIR)
+    parser.add_argument("--top", type=int, default=TOP_N)
+    args = parser.parse_args()
+
+    build_report(args.profile_dir, args.top)
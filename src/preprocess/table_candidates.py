@@ -0,0 +1,56 @@
+import unicodedata
+import fitz
+
+CAPTION_KEYWORDS = ("table", "bảng")
+AXIS_TOLERANCE = 1.0
+MIN_RULINGS = 2
+
+def mentions_table(text: str) -> bool:
+    # Tables are only kept when a caption mentions one, so a page that never says
+    # "table"/"bảng" cannot contribute any.
+    text = unicodedata.normalize("NFC", text).lower()
+    return any(keyword in text for keyword in CAPTION_KEYWORDS)
+
+
+def _path_points(item) -> list:
+    kind = item[0]
+    if kind == "l":
+        return [item[1], item[2]]
+    if kind == "re":
+        rect = item[1]
+        return [rect.tl, rect.tr, rect.br, rect.bl, rect.tl]
+    if kind == "qu":
+        quad = item[1]
+        return [quad.ul, quad.ur, quad.lr, quad.ll, quad.ul]
+    if kind == "c":
+        return list(item[1:5])
+    return []
+
+
+def count_rulings(page: fitz.Page) -> tuple:
+    # Same edges pdfplumber's "lines" strategy builds cells from: line segments and
+    # the sides of rectangles, split by orientation.
+    horizontal = vertical = 0
+    for path in page.get_drawings():
+        for item in path["items"]:
+            points = _path_points(item)
+            for p0, p1 in zip(points, points[1:]):
+                dx, dy = abs(p0.x - p1.x), abs(p0.y - p1.y)
+                if dy <= AXIS_TOLERANCE < dx:
+                    horizontal += 1
+                elif dx <= AXIS_TOLERANCE < dy:
+                    vertical += 1
+    return horizontal, vertical
+
+
+def is_table_candidate(page: fitz.Page, text: str) -> bool:
+    if not mentions_table(text):
+        return False
+    horizontal, vertical = count_rulings(page)
+    return horizontal >= MIN_RULINGS and vertical >= MIN_RULINGS
+
+
+def candidate_pages(file_path: str, pages: list = None) -> list:
+    with fitz.open(file_path) as doc:
+        pages = pages or range(1, doc.page_count + 1)
+        return [page_no for page_no in pages if is_table_candidate(doc[page_no - 1], doc[page_no - 1].get_text())]
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+
+from .logger import log_info, log_warning
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Raw files stay where crawlers and the UI expect them; the store is only an index. It
+# maps every raw path to its hash, lets unchanged files skip re-hashing, and remembers
+# the first path each content was seen at, which names its parsed and cleaned outputs.
+class ContentStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, "index.sqlite"))
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS paths (
+                path TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                size INTEGER,
+                mtime REAL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS paths_hash ON paths (hash)")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS objects (
+                hash TEXT PRIMARY KEY,
+                first_path TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+        self._drop_legacy_objects()
+
+    def _drop_legacy_objects(self):
+        # Older stores kept every content again under objects/<hash[:2]>/<hash>, hard-linked
+        # to or copied from the raw files, and nothing read it. Raw files still linked to a
+        # blob (and so to each other) get their own copy before the blobs are deleted.
+        objects_dir = os.path.join(self.root, "objects")
+        if not os.path.isdir(objects_dir):
+            return
+        for (path, content_hash) in self.conn.execute("SELECT path, hash FROM paths").fetchall():
+            blob = os.path.join(objects_dir, content_hash[:2], content_hash)
+            try:
+                if os.path.exists(path) and os.path.exists(blob) and os.path.samefile(path, blob):
+                    tmp_path = path + ".cas-tmp"
+                    shutil.copy2(path, tmp_path)
+                    os.replace(tmp_path, path)
+            except OSError as e:
+                log_warning(f"Content store could not unlink {path} from its blob: {e}")
+        shutil.rmtree(objects_dir, ignore_errors=True)
+        log_info(f"Content store: removed unused blob copies in {objects_dir}")
+
+    def file_hash(self, path: str) -> str:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.conn.execute("SELECT hash, size, mtime FROM paths WHERE path = ?", (path,)).fetchone()
+        if row and row[1] == stat.st_size and row[2] == stat.st_mtime:
+            return row[0]
+        content_hash = sha256_file(path)
+        self._record(path, content_hash)
+        return content_hash
+
+    def add(self, path: str) -> str:
+        path = os.path.abspath(path)
+        content_hash = self.file_hash(path)
+        self.conn.execute("INSERT OR IGNORE INTO objects (hash, first_path) VALUES (?, ?)", (content_hash, path))
+        self.conn.commit()
+        return content_hash
+
+    def canonical_path(self, content_hash: str, paths) -> str:
+        # The first path the content was seen at, while it still exists; a duplicate
+        # crawled later never renames the outputs.
+        row = self.conn.execute("SELECT first_path FROM objects WHERE hash = ?", (content_hash,)).fetchone()
+        by_abspath = {os.path.abspath(p): p for p in paths}
+        if row and row[0] in by_abspath:
+            return by_abspath[row[0]]
+        canonical = sorted(paths)[0]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO objects (hash, first_path) VALUES (?, ?)",
+            (content_hash, os.path.abspath(canonical)),
+        )
+        self.conn.commit()
+        return canonical
+
+    def group_by_content(self, file_paths):
+        # Returns hash -> paths with the canonical path first.
+        groups = {}
+        for file_path in sorted(file_paths):
+            groups.setdefault(self.add(file_path), []).append(file_path)
+        duplicates = sum(len(paths) - 1 for paths in groups.values())
+        if duplicates:
+            log_info(f"Content store: {len(file_paths)} files, {len(groups)} unique ({duplicates} duplicates)")
+        ordered = {}
+        for content_hash, paths in groups.items():
+            canonical = self.canonical_path(content_hash, paths)
+            ordered[content_hash] = [canonical] + [p for p in paths if p != canonical]
+        return ordered
+
+    def _record(self, path: str, content_hash: str):
+        stat = os.stat(path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO paths (path, hash, size, mtime) VALUES (?, ?, ?, ?)",
+            (path, content_hash, stat.st_size, stat.st_mtime),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
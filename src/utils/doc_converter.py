@@ -0,0 +1,304 @@
+import json
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from .logger import log_info, log_warning
+
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 1) // 2))
+TIMEOUT_PER_FILE = 180
+STARTUP_TIMEOUT = 90
+BRIDGE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uno_bridge.py")
+# LibreOffice export filters for the formats the crawlers convert to.
+FILTERS = {"pdf": "writer_pdf_Export", "docx": "MS Word 2007 XML"}
+
+
+@lru_cache(maxsize=1)
+def find_libreoffice() -> str:
+    libreoffice_cmd = "libreoffice" if os.name != "nt" else "soffice"
+    if subprocess.call([libreoffice_cmd, "--version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) != 0:
+        raise EnvironmentError("LibreOffice is not installed or not found in PATH.")
+    return libreoffice_cmd
+
+
+@lru_cache(maxsize=1)
+def find_uno_python() -> Optional[str]:
+    # LibreOffice's bundled interpreter first, then this one and the system python3
+    # (Debian/Ubuntu ship uno as python3-uno).
+    candidates = []
+    soffice = shutil.which(find_libreoffice())
+    if soffice:
+        program_dir = os.path.dirname(os.path.realpath(soffice))
+        candidates += [os.path.join(program_dir, "python"), os.path.join(program_dir, "python.exe")]
+    candidates += [sys.executable, shutil.which("python3")]
+    for python in candidates:
+        if not python or not os.path.exists(python):
+            continue
+        try:
+            if subprocess.call([python, "-c", "import uno"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30) == 0:
+                return python
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+    return None
+
+
+def _kill_session(process):
+    # soffice is a launcher that starts soffice.bin; both share the session it leads.
+    if process.poll() is not None:
+        return
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    process.kill()
+
+
+class _Job:
+    def __init__(self, doc_path, output_path, remove_source):
+        self.doc_path = doc_path
+        self.output_path = output_path
+        self.remove_source = remove_source
+        self.future = Future()
+
+
+# One warm, headless LibreOffice per worker, with its own user profile so instances run
+# side by side. soffice listens on a named pipe and stays up between documents; a bridge
+# process (uno_bridge.py, under a Python that has uno) loads and exports each document
+# through it, so startup is paid once per worker rather than once per file. Without a
+# uno-capable Python every document falls back to its own soffice --convert-to run.
+class _Office:
+    def __init__(self, cmd, python, work_dir, target_format):
+        self.cmd = cmd
+        self.python = python if target_format in FILTERS else None
+        self.target_format = target_format
+        self.profile_uri = Path(os.path.join(work_dir, "profile")).resolve().as_uri()
+        self.out_dir = os.path.join(work_dir, "out")
+        self.pipe_name = f"{os.path.basename(os.path.dirname(work_dir))}_{os.path.basename(work_dir)}"
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.soffice = None
+        self.bridge = None
+        self.replies = None
+
+    def convert(self, src, dst):
+        tmp_path = dst + ".part"
+        os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+        try:
+            if self.python:
+                self._convert_warm(src, tmp_path)
+            else:
+                self._convert_cli(src, tmp_path)
+            os.replace(tmp_path, dst)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _start(self):
+        self.soffice = subprocess.Popen(
+            [
+                self.cmd,
+                f"-env:UserInstallation={self.profile_uri}",
+                "--headless", "--invisible", "--nologo", "--nodefault", "--norestore", "--nolockcheck",
+                f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        self.bridge = subprocess.Popen(
+            [self.python, BRIDGE_SCRIPT, self.pipe_name],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            start_new_session=True,
+        )
+        self.replies = queue.Queue()
+        threading.Thread(target=self._read_replies, args=(self.bridge.stdout, self.replies), daemon=True).start()
+        reply = self._reply(STARTUP_TIMEOUT)
+        if "error" in reply:
+            self.stop()
+            raise RuntimeError(f"LibreOffice listener did not start: {reply['error']}")
+
+    @staticmethod
+    def _read_replies(stream, replies):
+        for line in stream:
+            replies.put(json.loads(line))
+        replies.put(None)
+
+    def _reply(self, timeout):
+        try:
+            reply = self.replies.get(timeout=timeout)
+        except queue.Empty:
+            # A hung document: only this instance is restarted, the queue carries on.
+            self.stop()
+            raise TimeoutError(f"no result after {timeout}s, LibreOffice restarted")
+        if reply is None:
+            self.stop()
+            raise RuntimeError("LibreOffice bridge exited")
+        return reply
+
+    def _convert_warm(self, src, dst):
+        if self.bridge is None:
+            self._start()
+        job = {"src": os.path.abspath(src), "dst": os.path.abspath(dst), "filter": FILTERS[self.target_format]}
+        try:
+            self.bridge.stdin.write(json.dumps(job) + "\n")
+            self.bridge.stdin.flush()
+        except OSError:
+            self.stop()
+            raise
+        reply = self._reply(TIMEOUT_PER_FILE)
+        if "error" in reply:
+            if self.soffice.poll() is not None:
+                self.stop()
+            raise RuntimeError(reply["error"])
+
+    def _convert_cli(self, src, dst):
+        for leftover in os.listdir(self.out_dir):
+            os.remove(os.path.join(self.out_dir, leftover))
+        process = subprocess.Popen(
+            [
+                self.cmd,
+                f"-env:UserInstallation={self.profile_uri}",
+                "--headless", "--norestore", "--nolockcheck",
+                "--convert-to", self.target_format,
+                "--outdir", self.out_dir,
+                src,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        try:
+            process.wait(timeout=TIMEOUT_PER_FILE)
+        except subprocess.TimeoutExpired:
+            _kill_session(process)
+            process.wait()
+            raise TimeoutError(f"no result after {TIMEOUT_PER_FILE}s")
+        converted_file = os.path.join(self.out_dir, Path(src).stem + f".{self.target_format}")
+        if not os.path.exists(converted_file):
+            raise RuntimeError(f"no output produced (exit code {process.returncode})")
+        shutil.move(converted_file, dst)
+
+    def stop(self):
+        if self.bridge is not None:
+            try:
+                self.bridge.stdin.close()
+            except OSError:
+                pass
+        for process in (self.bridge, self.soffice):
+            if process is not None:
+                _kill_session(process)
+                process.wait()
+        self.bridge = self.soffice = None
+
+
+# Conversion workers fed from a shared job queue; each drives its own _Office, and every
+# document gets its own timeout.
+class DocConverterPool:
+    def __init__(self, workers=None, target_format="pdf"):
+        self.workers = workers or DEFAULT_WORKERS
+        self.target_format = target_format
+        self.converted = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._work_root = None
+        self._started_at = None
+
+    def start(self):
+        if self._threads:
+            return self
+        self._cmd = find_libreoffice()
+        self._python = find_uno_python()
+        if not self._python:
+            log_warning("No Python with LibreOffice's uno module found; converting with one soffice run per file")
+        self._work_root = tempfile.mkdtemp(prefix="lo_profiles_")
+        self._started_at = time.monotonic()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, args=(index,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        log_info(f"Started {self.workers} LibreOffice workers ({'warm listeners' if self._python else 'one process per file'})")
+        return self
+
+    def submit(self, doc_path, output_path=None, remove_source=False) -> Future:
+        if not os.path.exists(doc_path):
+            raise FileNotFoundError(f"File not found: {doc_path}")
+        self.start()
+        output_path = output_path or os.path.splitext(doc_path)[0] + f".{self.target_format}"
+        job = _Job(doc_path, output_path, remove_source)
+        self._queue.put(job)
+        return job.future
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def join(self):
+        self._queue.join()
+
+    def shutdown(self, wait=True):
+        if wait:
+            self.join()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._work_root:
+            shutil.rmtree(self._work_root, ignore_errors=True)
+            self._work_root = None
+        self.log_throughput()
+
+    def log_throughput(self):
+        if self._started_at is None:
+            return
+        elapsed = time.monotonic() - self._started_at
+        per_minute = self.converted / elapsed * 60 if elapsed > 0 else 0.0
+        log_info(
+            f"LibreOffice pool: {self.converted} converted, {self.failed} failed "
+            f"in {elapsed:.1f}s ({per_minute:.1f} conversions/min, {self.workers} workers)"
+        )
+
+    def _worker(self, index):
+        office = _Office(self._cmd, self._python, os.path.join(self._work_root, f"worker_{index}"), self.target_format)
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    self._queue.task_done()
+                    return
+                try:
+                    self._convert(office, job)
+                finally:
+                    self._queue.task_done()
+        finally:
+            office.stop()
+
+    def _convert(self, office, job):
+        try:
+            office.convert(job.doc_path, job.output_path)
+            if job.remove_source and os.path.abspath(job.doc_path) != os.path.abspath(job.output_path):
+                os.remove(job.doc_path)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            log_warning(f"Failed to convert {job.doc_path}: {e}")
+            job.future.set_exception(RuntimeError(f"Failed to convert {job.doc_path} to {self.target_format}: {e}"))
+            return
+        with self._lock:
+            self.converted += 1
+        job.future.set_result(job.output_path)
@@ -1,24 +1,49 @@
 import zipfile
+import io
 import os
 import subprocess
 import json
 import shutil
 
-def extract_nested_zip(zip_path, extract_to):
+from .doc_converter import find_libreoffice
+
+def _safe_member_path(extract_to, member_name):
+    target = os.path.normpath(os.path.join(extract_to, member_name))
+    root = os.path.normpath(extract_to)
+    if os.path.commonpath([root, target]) != root:
+        return None
+    return target
+
+def extract_nested_zip(zip_path, extract_to, extensions=None):
+    # Only members matching `extensions` are inflated; nested zips are opened from memory.
+    extracted = []
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(extract_to)
-        for f in zip_ref.namelist():
-            if f.endswith(".zip"):
-                nested_path = os.path.join(extract_to, f)
-                extract_nested_zip(nested_path, os.path.join(extract_to, f.replace(".zip","")))
+        for member in zip_ref.infolist():
+            if member.is_dir():
+                continue
+            name = member.filename
+            if name.lower().endswith(".zip"):
+                with zip_ref.open(member) as nested:
+                    buffer = io.BytesIO(nested.read())
+                extracted.extend(extract_nested_zip(buffer, os.path.join(extract_to, name[:-4]), extensions))
+                continue
+            if extensions and not name.lower().endswith(extensions):
+                continue
+
+            target = _safe_member_path(extract_to, name)
+            if target is None:
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with zip_ref.open(member) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            extracted.append(target)
+    return extracted
 
 def convert_doc_to_pdf(file_path, output_path):
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    libreoffice_cmd = "libreoffice" if os.name != "nt" else "soffice"
-    if subprocess.call([libreoffice_cmd, "--version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) != 0:
-        raise EnvironmentError("LibreOffice is not installed or not found in PATH.")
+    libreoffice_cmd = find_libreoffice()
 
     try:
         subprocess.run(
@@ -0,0 +1,78 @@
+# Runs under a Python that has LibreOffice's uno module (LibreOffice's own program/python,
+# or the system python3 with python3-uno), not under the project's interpreter. It
+# connects to one headless soffice listening on a named pipe and converts the documents
+# named on stdin, one JSON job per line, answering each with one JSON line on stdout.
+import json
+import sys
+import time
+
+import uno
+from com.sun.star.beans import PropertyValue
+from com.sun.star.connection import NoConnectException
+
+CONNECT_TIMEOUT = 60
+
+
+def _props(**values):
+    props = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        props.append(prop)
+    return tuple(props)
+
+
+def connect(pipe_name):
+    local = uno.getComponentContext()
+    resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+    deadline = time.monotonic() + CONNECT_TIMEOUT
+    while True:
+        try:
+            context = resolver.resolve(f"uno:pipe,name={pipe_name};urp;StarOffice.ComponentContext")
+            return context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+        except NoConnectException:
+            # soffice is still starting up.
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def convert(desktop, src, dst, filter_name):
+    # UpdateDocMode 0 (NO_UPDATE): never refresh links to other files while converting.
+    document = desktop.loadComponentFromURL(
+        uno.systemPathToFileUrl(src), "_blank", 0, _props(Hidden=True, ReadOnly=True, UpdateDocMode=0)
+    )
+    if document is None:
+        raise RuntimeError("LibreOffice could not open the document")
+    try:
+        document.storeToURL(uno.systemPathToFileUrl(dst), _props(FilterName=filter_name, Overwrite=True))
+    finally:
+        document.close(True)
+
+
+def _error(e):
+    return f"{e.__class__.__name__}: {str(e) or getattr(e, 'Message', '')}"
+
+
+def main():
+    try:
+        desktop = connect(sys.argv[1])
+    except Exception as e:
+        print(json.dumps({"error": _error(e)}), flush=True)
+        return 1
+    print(json.dumps({"ready": True}), flush=True)
+
+    for line in sys.stdin:
+        job = json.loads(line)
+        try:
+            convert(desktop, job["src"], job["dst"], job["filter"])
+            reply = {"ok": True}
+        except Exception as e:
+            reply = {"error": _error(e)}
+        print(json.dumps(reply), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())